@@ -1,15 +1,96 @@
 import time
-import csv
-import pandas as pd
+from array import array
+from session_store import SessionStore, METRICS
 
+LIVE_WINDOW = 10  # Seconds covered by the live (rolling) metrics
 
-class Tracker:
+
+# Streaming mean and variance (Welford's algorithm), O(1) per sample
+class RunningStats:
     def __init__(self):
-        self.start_time = time.time()
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+
+# Event count over the last `window` seconds, kept in a fixed ring of
+# time buckets so adding and reading never allocate or rescan history
+class RollingCounter:
+    def __init__(self, window=LIVE_WINDOW, resolution=0.25):
+        self.resolution = resolution
+        self.size = int(window / resolution)
+        self.buckets = array('l', [0]) * self.size
+        self.total = 0
+        self.bucket = None  # Absolute index of the newest bucket
+
+    # Moves the ring forward to now, dropping buckets that left the window
+    def advance(self, now):
+        bucket = int(now / self.resolution)
+        if self.bucket is None:
+            self.bucket = bucket
+            return
+        steps = min(bucket - self.bucket, self.size)
+        for i in range(1, steps + 1):
+            slot = (self.bucket + i) % self.size
+            self.total -= self.buckets[slot]
+            self.buckets[slot] = 0
+        if bucket > self.bucket:
+            self.bucket = bucket
+
+    def add(self, now, n=1):
+        self.advance(now)
+        self.buckets[self.bucket % self.size] += n
+        self.total += n
+
+    def count(self, now):
+        self.advance(now)
+        return self.total
+
+
+# Histogram of key-to-screen latencies in fixed-width buckets (the last
+# one collects everything slower), so percentiles need no sample list
+class LatencyHistogram:
+    def __init__(self, bucket_ms=0.5, max_ms=250):
+        self.bucket_ms = bucket_ms
+        self.counts = array('l', [0]) * (int(max_ms / bucket_ms) + 1)
+        self.n = 0
+
+    def add(self, ms):
+        self.counts[min(int(ms / self.bucket_ms), len(self.counts) - 1)] += 1
+        self.n += 1
+
+    # Latency below which p percent of the samples fall (bucket midpoint),
+    # or None without samples
+    def percentile(self, p):
+        if not self.n:
+            return None
+        rank = max(1, -(-self.n * p // 100))  # ceil(n * p / 100)
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return (i + 0.5) * self.bucket_ms
+
+
+class Tracker:
+    def __init__(self, keylog=None, clock=time.time):
+        self.keylog = keylog  # Optional KeystrokeLog for per-key events
+        self.clock = clock
+        self.start_time = clock()
         self.words_typed = 0
         self.correct_words = 0
         self.incorrect_words = 0
         self.total_keystrokes = 0
+        self.letter_keystrokes = 0  # Typed letters, the accuracy base
         self.correct_keystrokes = 0
         self.backspace_count = 0
         self.word_streak = 0
@@ -19,7 +100,15 @@ class Tracker:
         self.words_missed = 0
         self.total_word_length = 0
         self.last_word_time = self.start_time
-        self.word_times = []
+        self.word_times = RunningStats()  # Seconds between typed words
+        # Rolling counts over the last LIVE_WINDOW seconds
+        self.recent_words = RollingCounter()
+        self.recent_keystrokes = RollingCounter()
+        self.recent_correct_keystrokes = RollingCounter()
+        # Typed letter pairs: attempts and mistakes, for weak-spot waves
+        self.bigram_attempts = {}
+        self.bigram_errors = {}
+        self.latency = LatencyHistogram()  # Key press to frame on screen
 
     def add_word(self, word):
         self.words_typed += 1
@@ -28,19 +117,60 @@ class Tracker:
         self.longest_streak = max(self.word_streak, self.longest_streak)
         self.chars_typed += len(word)
         self.total_word_length += len(word)
-        self.word_times.append(time.time() - self.last_word_time)
-        self.last_word_time = time.time()
+        now = self.clock()
+        self.word_times.add(now - self.last_word_time)
+        self.last_word_time = now
+        self.recent_words.add(now)
 
     def add_error(self):
         self.incorrect_words += 1
         self.word_streak = 0
 
-    def add_keystroke(self, correct=False, is_backspace=False):
+    # Counts one key press. correct is whether a typed letter matched a
+    # word; None for other keys (space, enter), which only count for KPM
+    def add_keystroke(self, correct=None, is_backspace=False):
         self.total_keystrokes += 1
         if is_backspace:
             self.backspace_count += 1
-        elif correct:
+            return
+        if correct is None:
+            return
+        self.letter_keystrokes += 1
+        now = self.clock()
+        self.recent_keystrokes.add(now)
+        if correct:
             self.correct_keystrokes += 1
+            self.recent_correct_keystrokes.add(now)
+
+    # Records typing char after prev (the previous typed letter)
+    def add_bigram(self, prev, char, correct):
+        bigram = (prev + char).lower()
+        self.bigram_attempts[bigram] = self.bigram_attempts.get(bigram, 0) + 1
+        if not correct:
+            self.bigram_errors[bigram] = self.bigram_errors.get(bigram, 0) + 1
+
+    # Letter pairs with the highest (smoothed) error rate this session
+    def weak_bigrams(self, count=5, min_attempts=3):
+        rates = [((self.bigram_errors.get(bigram, 0) + 1) / (attempts + 2),
+                  bigram)
+                 for bigram, attempts in self.bigram_attempts.items()
+                 if attempts >= min_attempts and bigram in self.bigram_errors]
+        rates.sort(reverse=True)
+        return [bigram for _, bigram in rates[:count]]
+
+    # Records how long a key press took to reach the screen, in ms
+    def add_latency(self, ms):
+        self.latency.add(ms)
+
+    # Key-to-screen latency percentile in ms (None if nothing measured)
+    def latency_percentile(self, p):
+        value = self.latency.percentile(p)
+        return round(value, 2) if value is not None else None
+
+    # Records one keystroke event in the keystroke log, if there is one
+    def log_key(self, key, correct=False, backspace=False, word_id=-1):
+        if self.keylog is not None:
+            self.keylog.log(key, correct, backspace, word_id)
 
     def add_shown_word(self):
         self.words_shown += 1
@@ -49,13 +179,13 @@ class Tracker:
         self.words_missed += 1
 
     def calculate_wpm(self, net=True):
-        elapsed = (time.time() - self.start_time) / 60
+        elapsed = (self.clock() - self.start_time) / 60
         if net:
             return self.correct_words / elapsed if elapsed > 0 else 0
         return (self.correct_words + self.incorrect_words) / elapsed if elapsed > 0 else 0
 
     def calculate_kpm(self):
-        elapsed = (time.time() - self.start_time) / 60
+        elapsed = (self.clock() - self.start_time) / 60
         return self.total_keystrokes / elapsed if elapsed > 0 else 0
 
     def accuracy(self, word_level=False):
@@ -63,11 +193,11 @@ class Tracker:
             total_attempts = self.correct_words + self.incorrect_words
             return (self.correct_words / total_attempts) * 100 if total_attempts > 0 else 0
         else:
-            total_chars = self.total_keystrokes - self.backspace_count
+            total_chars = self.letter_keystrokes
             return (self.correct_keystrokes / total_chars) * 100 if total_chars > 0 else 0
 
     def error_rate(self):
-        total_chars = self.total_keystrokes - self.backspace_count
+        total_chars = self.letter_keystrokes
         errors = total_chars - self.correct_keystrokes
         return (errors / total_chars) * 100 if total_chars > 0 else 0
 
@@ -75,40 +205,68 @@ class Tracker:
         return self.total_word_length / self.correct_words if self.correct_words > 0 else 0
 
     def average_word_time(self):
-        return sum(self.word_times) / len(
-            self.word_times) if self.word_times else 0
+        return self.word_times.mean
+
+    def word_time_stddev(self):
+        return self.word_times.variance() ** 0.5
+
+    # Seconds the live metrics currently cover (less early in a session)
+    def live_window(self, now):
+        return min(LIVE_WINDOW, now - self.start_time)
+
+    # Net WPM over the last LIVE_WINDOW seconds
+    def live_wpm(self):
+        now = self.clock()
+        window = self.live_window(now)
+        words = self.recent_words.count(now)
+        return words * 60 / window if window > 0 else 0
+
+    # Character accuracy over the last LIVE_WINDOW seconds
+    def live_accuracy(self):
+        now = self.clock()
+        keys = self.recent_keystrokes.count(now)
+        correct = self.recent_correct_keystrokes.count(now)
+        return correct / keys * 100 if keys > 0 else 0
 
     def total_time_played(self):
-        return time.time() - self.start_time
+        return self.clock() - self.start_time
 
     def reset(self):
-        self.__init__()
+        keylog = self.keylog
+        self.__init__(keylog, self.clock)
+        if keylog is not None:
+            keylog.start_session(self.start_time)
+
+    # Session summary keyed by the store's metric names
+    def session_row(self, score):
+        return dict(zip(METRICS, [
+            round(self.calculate_wpm(net=True), 2),
+            round(self.calculate_wpm(net=False), 2),
+            round(self.calculate_kpm(), 2),
+            round(self.accuracy(word_level=True), 2),
+            round(self.accuracy(word_level=False), 2),
+            round(self.error_rate(), 2),
+            score,
+            self.words_typed,
+            self.correct_words,
+            self.incorrect_words,
+            self.chars_typed,
+            self.correct_keystrokes,
+            self.backspace_count,
+            self.longest_streak,
+            round(self.average_word_length(), 2),
+            round(self.average_word_time(), 3),
+            round(self.total_time_played(), 2),
+            self.words_shown,
+            self.words_missed,
+            self.latency_percentile(50),
+            self.latency_percentile(95),
+            self.latency_percentile(99)
+        ]))
 
     @staticmethod
-    def read_csv(path):
-        return pd.read_csv(path)
-
-    def save_to_csv(self, score):
-        with open('statistics.csv', 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                round(self.calculate_wpm(net=True), 2),
-                round(self.calculate_wpm(net=False), 2),
-                round(self.calculate_kpm(), 2),
-                round(self.accuracy(word_level=True), 2),
-                round(self.accuracy(word_level=False), 2),
-                round(self.error_rate(), 2),
-                score,
-                self.words_typed,
-                self.correct_words,
-                self.incorrect_words,
-                self.chars_typed,
-                self.correct_keystrokes,
-                self.backspace_count,
-                self.longest_streak,
-                round(self.average_word_length(), 2),
-                round(self.average_word_time(), 3),
-                round(self.total_time_played(), 2),
-                self.words_shown,
-                self.words_missed
-            ])
+    def open_store(path=None):
+        return SessionStore(path) if path else SessionStore()
+
+    def save_session(self, score, store):
+        store.add(self.session_row(score))
@@ -1,78 +1,310 @@
+import os
+import itertools
 import pygame
-import copy
-import random
-from nltk.corpus import words
+import numpy as np
+from collections import OrderedDict
 from Tracker import Tracker
+from word_sampler import WordSampler, distinct
+from corpus import Corpus, load_corpus
+from ngram_index import NgramIndex
+from lane_layout import LaneLayout
 
-pygame.init()
-screen = pygame.display.set_mode([1000, 800])
-pygame.display.set_caption('Type Defender')
-timer = pygame.time.Clock()
+WIDTH, HEIGHT = 1000, 800
+screen = None  # Display surface, created by init_display()
+timer = None
+
+
+# Initialises pygame and opens the game window. In headless mode SDL's
+# dummy video driver is used, so no window or display server is needed.
+def init_display(headless=False):
+    global screen, timer
+    if headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    pygame.init()
+    screen = pygame.display.set_mode([WIDTH, HEIGHT])
+    pygame.display.set_caption('Type Defender')
+    timer = pygame.time.Clock()
+    return screen
+
+
+# The font words are drawn in. Only needs pygame's font module, so it
+# also measures word widths for layouts made without a display.
+def word_font():
+    pygame.font.init()
+    return pygame.font.SysFont(None, 48)
+
+
+# Size-bounded LRU cache of rendered text surfaces, keyed by font,
+# text and colour, so words and HUD labels are not re-rendered every frame
+class TextCache:
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+
+    # Returns the rendered surface, rendering it only on a cache miss
+    def render(self, font, text, colour):
+        key = (font, text, colour)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = font.render(text, True, colour)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)  # Evict least recently used
+        return surface
+
+
+text_cache = TextCache()  # Shared by Enemy, Menu and wave prerendering
 
 
 class Dataset:
-    def __init__(self):
-        self.wordlist = words.words()  # Load English words from nltk
-        self.wordlist.sort(key=len)  # Sort words by length
+    # corpus: a Corpus, or a source for load_corpus() (None is the NLTK
+    # English list; a path loads a packed index or a plain word list)
+    def __init__(self, seed=None, corpus=None):
+        self.rng = np.random.default_rng(seed)  # All word/wave randomness
+        if not isinstance(corpus, Corpus):
+            corpus = load_corpus(corpus)
+        self.wordlist = corpus  # Words sorted by length
         self.len_indexes = self.get_length_indexes()
+        self.sampler = WordSampler(self.len_indexes, self.rng)
+        self.ngrams = None  # Bigram index, see load_ngrams
+        self.layout = LaneLayout()  # Set layout.measure to real text widths
+        self.speeds = (3, 5)  # Slowest and fastest word speed, px per step
+
+    # Restarts all word/wave randomness from seed
+    def reseed(self, seed):
+        self.rng = self.sampler.rng = np.random.default_rng(seed)
 
     # Returns a list of indexes where word length increases in the sorted list
     def get_length_indexes(self):
-        len_indexes = []
-        length = 1
-        for i in range(len(self.wordlist)):
-            if len(self.wordlist[i]) > length:
-                length += 1
-                len_indexes.append(i)
-        len_indexes.append(len(self.wordlist))
-        return len_indexes
+        return self.wordlist.len_indexes
+
+    # Builds the bigram index focused waves pick from, once. Slow for a
+    # large corpus, so game loops call it ahead (e.g. on the wave worker)
+    # rather than leaving it to the first focused wave.
+    def load_ngrams(self):
+        if self.ngrams is None:
+            self.ngrams = NgramIndex(self.wordlist)
+
+    # What makes two vocabulary entries the same word in a wave: words are
+    # shown lowercased apart from random capitals, so case does not count
+    def word_key(self, i):
+        return self.wordlist[i].lower()
+
+    # Vocabulary indexes for a wave of n words. Up to focus_share of them
+    # contain one of the focus bigrams (e.g. the player's weak spots).
+    def pick_words(self, n, unique, focus, focus_share):
+        key = self.word_key if unique else None
+        if not focus:
+            return self.sampler.sample(n, unique, key=key)
+        self.load_ngrams()
+        picked = self.ngrams.sample(self.rng, round(n * focus_share), focus,
+                                    self.sampler.buckets())
+        exclude = ()
+        if unique:
+            picked = distinct(picked, key)
+            exclude = set(picked.tolist())
+        rest = self.sampler.sample(n - len(picked), unique, exclude, key)
+        return np.concatenate((picked, rest)).astype(np.int64)
 
     # Generates a list of Enemy word objects
-    # based on the level and selected word lengths
-    def get_words(self, level, choices):
-        word_objs = []
-        include = []
-        vertical_spacing = (800 - 150) // level
+    # based on the level and selected word lengths.
+    # With unique, no word repeats in the wave, ignoring case, unless the
+    # selected lengths have too few words for it. focus lists
+    # bigrams that focus_share of the wave should practise. Words are laid
+    # out in lanes clear of each other.
+    def get_words(self, level, choices, unique=True, focus=(),
+                  focus_share=0.5):
         if True not in choices:
             choices[0] = True
-        for i in range(len(choices)):
-            if choices[i]:
-                include.append((self.len_indexes[i], self.len_indexes[i + 1]))
+        self.sampler.set_choices(choices)
+        rng = self.rng
+        # The whole wave is drawn in a few vectorized calls
+        indexes = self.pick_words(level, unique, focus, focus_share).tolist()
+        speeds = rng.integers(self.speeds[0], self.speeds[1] + 1,
+                              level).tolist()
+        x_positions = rng.integers(1000, 1000 + 1000 + 1, level).tolist()
+        lanes = rng.integers(0, self.layout.n_lanes, level).tolist()
+        capitalize = (rng.random(level) < 0.3).tolist()
+        cap_points = rng.random(level).tolist()
+
+        self.layout.reset()
+        word_objs = []
         for i in range(level):
-            speed = random.randint(3, 5)
-            y_pos = random.randint(10 + (i * vertical_spacing),
-                                   (i + 1) * vertical_spacing)
-            x_pos = random.randint(1000, 1000 + 1000)
-            ind_sel = random.choice(include)
-            index = random.randint(ind_sel[0], ind_sel[1] - 1)
-            text = self.wordlist[index].lower()
-            if random.random() < 0.3:
-                j = random.randint(0, len(text) - 1)
+            text = self.wordlist[indexes[i]].lower()
+            if capitalize[i]:
+                j = int(cap_points[i] * len(text))
                 text = text[:j] + text[j].upper() + text[j + 1:]
-            word_objs.append(Enemy(text, speed, y_pos, x_pos))
+            x, y = self.layout.place(text, speeds[i], x_positions[i],
+                                     lanes[i])
+            word_objs.append(Enemy(text, speeds[i], y, x))
         return word_objs
 
 
-# Class representing a falling word (enemy) on the screen
+# Class representing a falling word (enemy) on the screen. Once spawned,
+# its position and speed live in an EnemyStore; x_pos is the spawn point.
 class Enemy:
+    ids = itertools.count()  # Unique word ids, e.g. for the keystroke log
+    colour = 'black'
+
     def __init__(self, text, speed, y_pos, x_pos):
+        self.id = next(Enemy.ids)
         self.text = text
         self.speed = speed
         self.y_pos = y_pos
         self.x_pos = x_pos
+        self.slot = None  # Index into the EnemyStore arrays
+        self.group = None  # EnemyGroup holding the word in a shared store
 
-    # Draw the word and highlight matching prefix
-    def draw(self, font, active_string):
-        screen.blit(font.render(self.text, True, 'black'),
-                    (self.x_pos, self.y_pos))
+    # Draw the word at x and highlight matching prefix;
+    # returns the drawn area
+    def draw(self, font, active_string, x=None):
+        x = self.x_pos if x is None else x
+        rect = screen.blit(text_cache.render(font, self.text, self.colour),
+                           (x, self.y_pos))
         act_len = len(active_string)
-        if active_string == self.text[:act_len]:
-            screen.blit(font.render(active_string, True, (255, 198, 0)),
-                        (self.x_pos, self.y_pos))
+        if active_string and active_string == self.text[:act_len]:
+            screen.blit(text_cache.render(font, active_string, (255, 198, 0)),
+                        (x, self.y_pos))
+        return rect
+
+
+# Struct-of-arrays state for the words on screen: positions, speeds and
+# liveness are NumPy arrays so movement and expiry are vectorized
+class EnemyStore:
+    def __init__(self, capacity=64):
+        self.x = np.zeros(capacity)
+        self.prev_x = np.zeros(capacity)  # Position before the last step
+        self.y = np.zeros(capacity)
+        self.speed = np.zeros(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.enemies = [None] * capacity
+        self.free = list(range(capacity - 1, -1, -1))
+        self.live = 0
+
+    def __len__(self):
+        return self.live
+
+    # Live enemies in slot order
+    def __iter__(self):
+        return (self.enemies[slot] for slot in np.flatnonzero(self.alive))
+
+    def grow(self):
+        old = len(self.alive)
+        for name in ('x', 'prev_x', 'y', 'speed', 'alive'):
+            arr = getattr(self, name)
+            grown = np.zeros(old * 2, dtype=arr.dtype)
+            grown[:old] = arr
+            setattr(self, name, grown)
+        self.enemies.extend([None] * old)
+        self.free.extend(range(old * 2 - 1, old - 1, -1))
 
-    # Move the word left based on its speed
-    def update(self):
-        self.x_pos -= self.speed
+    def add(self, enemy):
+        if not self.free:
+            self.grow()
+        slot = self.free.pop()
+        enemy.slot = slot
+        self.enemies[slot] = enemy
+        self.x[slot] = self.prev_x[slot] = enemy.x_pos
+        self.y[slot] = enemy.y_pos
+        self.speed[slot] = enemy.speed
+        self.alive[slot] = True
+        self.live += 1
+
+    def remove(self, enemy):
+        slot = enemy.slot
+        if slot is None or self.enemies[slot] is not enemy:
+            return
+        self.alive[slot] = False
+        self.enemies[slot] = None
+        self.free.append(slot)
+        enemy.slot = None
+        self.live -= 1
+
+    def clear(self):
+        for enemy in list(self):
+            self.remove(enemy)
+
+    # Advances every word by steps fixed simulation steps in one move (to
+    # catch up after a long frame); prev_x keeps the positions one step
+    # back for interpolation. Removes and returns the words that scrolled
+    # off the left edge.
+    def step(self, steps=1):
+        if steps > 1:
+            self.x -= self.speed * (steps - 1)
+        np.copyto(self.prev_x, self.x)
+        self.x -= self.speed
+        expired = np.flatnonzero(self.alive & (self.x < -200))
+        gone = [self.enemies[slot] for slot in expired]
+        for enemy in gone:
+            self.remove(enemy)
+        return gone
+
+    # Steps until the next word expires, or None with no words on screen
+    def steps_to_expiry(self):
+        slots = np.flatnonzero(self.alive)
+        if not len(slots):
+            return None
+        steps = np.floor((self.x[slots] + 200) / self.speed[slots])
+        return int(steps.min()) + 1
+
+    # Live enemies with their positions interpolated between the last two
+    # steps (alpha in [0, 1]) for drawing
+    def interpolated(self, alpha):
+        slots = np.flatnonzero(self.alive)
+        xs = self.prev_x[slots] + (self.x[slots] - self.prev_x[slots]) * alpha
+        return zip((self.enemies[slot] for slot in slots), xs.tolist())
+
+
+# One session's words inside an EnemyStore shared by many sessions, so a
+# single vectorized step moves the words of all of them (see server.py).
+# Provides the parts of the EnemyStore interface a GameSession uses;
+# stepping the shared store and routing expired words back is left to
+# its owner.
+class EnemyGroup:
+    def __init__(self, store, owner=None):
+        self.store = store
+        self.owner = owner  # Whatever the store's owner needs to find
+        self.members = {}  # Enemy -> None, in spawn order
+
+    @property
+    def x(self):
+        return self.store.x
+
+    @property
+    def speed(self):
+        return self.store.speed
+
+    def __len__(self):
+        return len(self.members)
+
+    def __iter__(self):
+        return iter(list(self.members))
+
+    def add(self, enemy):
+        self.store.add(enemy)
+        enemy.group = self
+        self.members[enemy] = None
+
+    def remove(self, enemy):
+        self.store.remove(enemy)
+        self.discard(enemy)
+
+    # Forgets an enemy the shared store already removed
+    def discard(self, enemy):
+        if enemy in self.members:
+            del self.members[enemy]
+            enemy.group = None
+
+    def clear(self):
+        for enemy in list(self.members):
+            self.remove(enemy)
+
+    # Words only move when the shared store is stepped
+    def step(self, steps=1):
+        return []
 
 
 # Class responsible for drawing all menu and UI elements
@@ -81,6 +313,44 @@ class Menu:
         self.header_font = pygame.font.SysFont('CALLUNA', 50)
         self.pause_font = pygame.font.SysFont('CALLUNA', 38)
         self.banner_font = pygame.font.SysFont('CALLUNA', 50)
+        self.stats_font = pygame.font.SysFont('CALLUNA', 24)
+        self.text_cache = text_cache
+        # Static layers, rendered once and blitted every frame
+        self.background = self.build_background()
+        self.pause_panel = self.build_pause_panel()
+        self.hud_items = [('', pygame.Rect(0, 0, 0, 0))] * 6  # (text, rect)
+        self.hud_dirty = []  # Regions draw_hud changed on the last call
+        self.pause_dirty = []  # Regions draw_pause changed on the last call
+
+    # Gray playfield with the HUD bar, dividers and border
+    def build_background(self):
+        surface = pygame.Surface((WIDTH, HEIGHT))
+        surface.fill('gray')
+        pygame.draw.rect(surface, (255, 198, 0), [0, 800 - 100, 1000, 100])
+        pygame.draw.line(surface, 'black', (0, 800 - 100), (1000, 800 - 100), 5)
+        pygame.draw.line(surface, 'black', (300, 800 - 100), (300, 800), 5)
+        pygame.draw.line(surface, 'black', (800, 800 - 100), (800, 800), 5)
+        pygame.draw.rect(surface, 'black', [0, 0, 1000, 800], 5)
+        return surface.convert() if pygame.display.get_surface() else surface
+
+    # Translucent pause panel with its static labels (buttons excluded)
+    def build_pause_panel(self):
+        surface = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        pygame.draw.rect(surface, (0, 0, 0, 100), [200, 200, 600, 400], 0, 5)
+        pygame.draw.rect(surface, (0, 0, 0, 200), [200, 200, 600, 400], 5, 5)
+        surface.blit(self.text_cache.render(self.header_font, 'MENU', 'white'),(210, 210))
+        surface.blit(self.text_cache.render(self.header_font, 'PLAY!', 'white'),(310, 275))
+        surface.blit(self.text_cache.render(self.header_font, 'QUIT', 'white'),(650, 275))
+        surface.blit(self.text_cache.render(self.header_font, 'Statistic', 'black'),(760, 10))
+        surface.blit(self.text_cache.render(self.header_font, 'Active Letter Lengths:', 'white'),(210, 350))
+        return surface
+
+    # Screen area covered by the circle button centred on (x, y)
+    @staticmethod
+    def button_rect(x, y):
+        rect = pygame.Rect(0, 0, 72, 72)
+        rect.center = (x, y)
+        return rect
 
     # Draws a circle button and returns True if clicked
     def draw_button(self, x, y, text, surf):
@@ -93,54 +363,73 @@ class Menu:
             else:
                 pygame.draw.circle(surf, (190, 89, 135), (x, y), 35)
         pygame.draw.circle(surf, 'black', (x, y), 35, 5)
-        surf.blit(self.pause_font.render(text, True, 'white'),
+        surf.blit(self.text_cache.render(self.pause_font, text, 'white'),
                   (x - 15, y - 25))
         return clicked
 
-    # Draws the HUD including level, score, and lives
-    def draw_hud(self, level, active_string, score, high_score, lives):
-        pygame.draw.rect(screen, (255, 198, 0), [0, 800 - 100, 1000, 100])
-        pygame.draw.rect(screen, 'black', [0, 0, 1000, 800], 5)
-        pygame.draw.line(screen, 'black', (0, 800 - 100),(1000, 800 - 100), 5)
-        pygame.draw.line(screen, 'black', (300, 800 - 100), (300, 800),5)
-        pygame.draw.line(screen, 'black', (800, 800 - 100), (800, 800),5)
-        pygame.draw.rect(screen, 'black', [0, 0, 1000, 800], 5)
-        screen.blit(self.header_font.render(f'Level: {level}', True, 'black'),(10, 800 - 75))
-        screen.blit(self.header_font.render(f'"{active_string}"', True, 'black'),(320, 800 - 75))
-        screen.blit(self.banner_font.render(f'Score: {score}', True, 'black'),(300, 10))
-        screen.blit( self.banner_font.render(f'Best: {high_score}', True, 'black'),(550, 10))
-        screen.blit(self.banner_font.render(f'Lives: {lives}', True, 'black'),(10, 10))
+    # Draws the HUD texts (level, input, score, best, lives, live stats)
+    # and the pause button over the background. With erased (rects restored from the
+    # background this frame) only the texts that changed or were erased are
+    # redrawn; the touched regions are left in hud_dirty.
+    def draw_hud(self, level, active_string, score, high_score, lives,
+                 erased=None, live_stats=''):
+        items = ((self.header_font, f'Level: {level}', (10, 800 - 75)),
+                 (self.header_font, f'"{active_string}"', (320, 800 - 75)),
+                 (self.banner_font, f'Score: {score}', (300, 10)),
+                 (self.banner_font, f'Best: {high_score}', (550, 10)),
+                 (self.banner_font, f'Lives: {lives}', (10, 10)),
+                 (self.stats_font, live_stats, (320, 800 - 28)))
+        self.hud_dirty = dirty = []
+        for i, (font, text, pos) in enumerate(items):
+            old_text, old_rect = self.hud_items[i]
+            if erased is not None:
+                if text == old_text and old_rect.collidelist(erased) < 0:
+                    continue
+                screen.blit(self.background, old_rect, old_rect)
+                dirty.append(old_rect)
+            rect = screen.blit(self.text_cache.render(font, text, 'black'), pos)
+            self.hud_items[i] = (text, rect)
+            dirty.append(rect)
 
+        rect = self.button_rect(948, 800 - 52)
+        if erased is not None:
+            screen.blit(self.background, rect, rect)
+        dirty.append(rect)
         return self.draw_button(948, 800 - 52, 'II', screen)
 
-    def draw_pause(self, choices):
-        surface = pygame.Surface((1000, 800), pygame.SRCALPHA)
-        pygame.draw.rect(surface, (0, 0, 0, 100), [200, 200, 600, 400], 0, 5)
-        pygame.draw.rect(surface, (0, 0, 0, 200), [200, 200, 600, 400], 5, 5)
-        resume = self.draw_button(260, 300, '>', surface)
-        quit_btn = self.draw_button(610, 300, 'X',surface)
-        stat_btn = self.draw_button(950, 50, 'S',surface)
-        surface.blit(self.header_font.render('MENU', True, 'white'),(210, 210))
-        surface.blit(self.header_font.render('PLAY!', True, 'white'),(310, 275))
-        surface.blit(self.header_font.render('QUIT', True, 'white'),(650, 275))
-        surface.blit(self.header_font.render('Statistic', True, 'black'),(760, 10))
-        surface.blit(self.header_font.render('Active Letter Lengths:', True, 'white'),(210, 350))
-
-        changes = copy.deepcopy(choices)
+    # Draws the pause panel and its buttons. With base (the frame under the
+    # panel) only the button regions are restored and redrawn; they are
+    # left in pause_dirty.
+    def draw_pause(self, choices, base=None):
+        buttons = [(260, 300), (610, 300), (950, 50)]
+        buttons += [(260 + (i * 80), 450) for i in range(len(choices))]
+        self.pause_dirty = [self.button_rect(x, y) for x, y in buttons]
+        if base is None:
+            screen.blit(self.pause_panel, (0, 0))
+        else:
+            for rect in self.pause_dirty:
+                screen.blit(base, rect, rect)
+                screen.blit(self.pause_panel, rect, rect)
+        resume = self.draw_button(260, 300, '>', screen)
+        quit_btn = self.draw_button(610, 300, 'X', screen)
+        stat_btn = self.draw_button(950, 50, 'S', screen)
+
+        changes = list(choices)
         for i in range(len(choices)):
-            btn = self.draw_button(260 + (i * 80), 450, str(i + 2),surface)
+            btn = self.draw_button(260 + (i * 80), 450, str(i + 2), screen)
             if btn:
                 changes[i] = not changes[i]
             if choices[i]:
-                pygame.draw.circle(surface, (255, 198, 0),(260 + (i * 80), 450), 35, 5)
+                pygame.draw.circle(screen, (255, 198, 0),(260 + (i * 80), 450), 35, 5)
 
-        screen.blit(surface, (0, 0))
         return resume, changes, quit_btn,stat_btn
 
 
 # Main game class: runs the game loop and manages state
 class Game:
     def __init__(self):
+        if screen is None:
+            init_display()
         self.dataset = Dataset()  # Manages word data
         self.menu = Menu()  # Manages UI and menu
         self.tracker = Tracker()
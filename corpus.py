@@ -0,0 +1,94 @@
+import os
+from abc import ABC, abstractmethod
+
+# Corpus backends. A corpus is a read-only sequence of words sorted by
+# length with len_indexes bucket boundaries: words of length i + 2 are
+# corpus[len_indexes[i]:len_indexes[i + 1]] (see Dataset.get_words).
+# ListCorpus wraps an in-memory list; vocab_index.VocabIndex is the
+# compact, memory-mapped backend that large word lists should use.
+
+
+class Corpus(ABC):
+    len_indexes = []
+
+    @abstractmethod
+    def __len__(self):
+        ...
+
+    @abstractmethod
+    def __getitem__(self, i):
+        ...
+
+    def close(self):
+        pass
+
+
+# Words held as Python strings (about 50 bytes each); fine for small lists
+class ListCorpus(Corpus):
+    def __init__(self, words):
+        from vocab_index import length_indexes
+        self.words = sorted(words, key=len)
+        self.len_indexes = length_indexes(self.words)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __getitem__(self, i):
+        return self.words[i]
+
+
+# Streams the entries of a word list file, one per line; blank lines and
+# lines starting with '#' are skipped
+def read_word_file(path, encoding='utf-8'):
+    with open(path, encoding=encoding) as f:
+        for line in f:
+            word = line.strip()
+            if word and not word.startswith('#'):
+                yield word
+
+
+# Stamp of a source file; a packed index built from it is stale once the
+# file's size or modification time changes
+def file_stamp(path):
+    st = os.stat(path)
+    return (st.st_size * 1000003 + st.st_mtime_ns) & 0xFFFFFFFFFFFFFFFF
+
+
+# Opens the corpus for source:
+#   None         the NLTK English word list, via the prebuilt vocab.idx
+#   'x.idx'      a packed index built earlier with build_vocab_index
+#   any file     a plain word list, one entry per line; packed into
+#                '<file>.idx' on first use and memory-mapped after that
+def load_corpus(source=None):
+    from vocab_index import (VocabIndex, build_vocab_index, nltk_word_files,
+                             sources_stamp)
+    if source is None:
+        # Only the recorded word-list files are checked; NLTK itself is
+        # imported just to rebuild a missing or stale index
+        corpus = VocabIndex.load()
+        if corpus is not None and corpus.is_current():
+            return corpus
+        if corpus is not None:
+            corpus.close()
+        from nltk.corpus import words
+        corpus = ListCorpus(words.words())  # Load English words from nltk
+        sources = nltk_word_files()
+        try:  # Index is missing or stale: rebuild it for the next launch
+            build_vocab_index(corpus.words, stamp=sources_stamp(sources),
+                              sources=sources)
+        except OSError:
+            pass
+        return corpus
+    if source.endswith('.idx'):
+        corpus = VocabIndex.load(source)
+        if corpus is None:
+            raise ValueError(f'{source} is not a vocabulary index')
+        return corpus
+    index_path = source + '.idx'
+    stamp = file_stamp(source)
+    corpus = VocabIndex.load(index_path, stamp=stamp)
+    if corpus is None:
+        build_vocab_index(read_word_file(source), index_path, stamp,
+                          sources=[source])
+        corpus = VocabIndex.load(index_path, stamp=stamp)
+    return corpus
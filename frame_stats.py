@@ -0,0 +1,72 @@
+import csv
+from array import array
+from time import perf_counter
+
+PHASES = ('events', 'draw_hud', 'draw_pause', 'enemies', 'check_answer',
+          'flip')
+
+
+# Per-phase frame timings kept in fixed-size ring buffers (milliseconds),
+# so recording a sample never allocates
+class FrameProfiler:
+    def __init__(self, capacity=600, phases=PHASES):
+        self.capacity = capacity
+        self.samples = {phase: array('d', bytes(8 * capacity))
+                        for phase in phases}
+        self.counts = dict.fromkeys(phases, 0)
+        self.show_overlay = False
+        self.overlay_every = 30  # Frames between overlay text refreshes
+        self.overlay_frame = 0
+        self.overlay_lines = []
+
+    # Records the time since start (a perf_counter() value) for phase
+    def record(self, phase, start):
+        count = self.counts[phase]
+        self.samples[phase][count % self.capacity] = \
+            (perf_counter() - start) * 1000
+        self.counts[phase] = count + 1
+
+    # Samples for phase in chronological order (oldest first)
+    def ordered(self, phase):
+        count = self.counts[phase]
+        buf = self.samples[phase]
+        if count <= self.capacity:
+            return buf[:count]
+        split = count % self.capacity
+        return buf[split:] + buf[:split]
+
+    # Returns (p50, p99, max) in ms, or None when phase has no samples
+    def summary(self, phase):
+        values = sorted(self.ordered(phase))
+        if not values:
+            return None
+        last = len(values) - 1
+        return (values[last // 2], values[round(last * 0.99)], values[last])
+
+    def draw_overlay(self, surface, font, pos=(10, 70)):
+        if not self.show_overlay:
+            return
+        if self.overlay_frame % self.overlay_every == 0:
+            self.overlay_lines = []
+            for phase in self.samples:
+                stats = self.summary(phase)
+                if stats is None:
+                    continue
+                text = (f'{phase:>12} p50 {stats[0]:6.2f}  p99 {stats[1]:6.2f}'
+                        f'  max {stats[2]:6.2f} ms')
+                self.overlay_lines.append(font.render(text, True, 'black',
+                                                      'white'))
+        self.overlay_frame += 1
+        x, y = pos
+        for line in self.overlay_lines:
+            surface.blit(line, (x, y))
+            y += line.get_height()
+
+    # Writes every buffered sample as phase,index,ms rows
+    def dump(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Phase', 'Sample', 'Milliseconds'])
+            for phase in self.samples:
+                for i, ms in enumerate(self.ordered(phase)):
+                    writer.writerow([phase, i, round(ms, 4)])
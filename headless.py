@@ -0,0 +1,88 @@
+import time
+import pygame
+
+
+# Clock that advances a fixed amount per tick without ever sleeping,
+# so the game loop runs as fast as the CPU allows
+class VirtualClock:
+    def __init__(self, fps=60):
+        self.frame_ms = 1000 / fps
+        self.ticks = 0
+
+    def tick(self, framerate=0):
+        self.ticks += 1
+        return self.frame_ms
+
+    def get_time(self):
+        return self.frame_ms
+
+    # Simulated milliseconds since the clock started
+    def elapsed_ms(self):
+        return self.ticks * self.frame_ms
+
+
+# Replays a fixed list of (tick, event) pairs in place of pygame.event.
+# Posts QUIT once the script is exhausted or max_ticks is reached.
+class ScriptedInput:
+    def __init__(self, script=(), max_ticks=None):
+        self.script = sorted(script, key=lambda item: item[0])
+        self.max_ticks = max_ticks
+        self.pos = 0
+        self.tick = 0
+
+    # Returns the events due on the current tick (called once per frame)
+    def get(self):
+        due = []
+        while (self.pos < len(self.script)
+               and self.script[self.pos][0] <= self.tick):
+            due.append(self.script[self.pos][1])
+            self.pos += 1
+        self.tick += 1
+        if ((self.max_ticks is None and self.pos >= len(self.script))
+                or (self.max_ticks is not None
+                    and self.tick >= self.max_ticks)):
+            due.append(pygame.event.Event(pygame.QUIT))
+        return due
+
+    # Helpers for building scripts
+    @staticmethod
+    def key(tick, key, unicode=''):
+        return tick, pygame.event.Event(pygame.KEYDOWN, key=key,
+                                        unicode=unicode)
+
+    @staticmethod
+    def type_text(text, start_tick, ticks_per_key=6):
+        script = []
+        tick = start_tick
+        for char in text:
+            if char == ' ':
+                script.append(ScriptedInput.key(tick, pygame.K_SPACE, ' '))
+            else:
+                script.append(ScriptedInput.key(tick, ord(char.lower()),
+                                                char))
+            tick += ticks_per_key
+        return script
+
+
+# Runs one game without a window on a virtual clock; returns the game
+# and the achieved ticks per second
+def run_headless(script=(), max_ticks=None, render=False, fps=60):
+    from main import Game
+    events = ScriptedInput(script, max_ticks)
+    clock = VirtualClock(fps)
+    game = Game(headless=True, render=render, events=events, clock=clock,
+                save_stats=False)
+    start = time.perf_counter()
+    game.run()
+    elapsed = time.perf_counter() - start
+    return game, clock.ticks / elapsed if elapsed > 0 else 0
+
+
+if __name__ == '__main__':
+    import sys
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    # Unpause with ESC, then let the waves run until max_ticks
+    start_script = [ScriptedInput.key(0, pygame.K_ESCAPE)]
+    game, tps = run_headless(start_script, max_ticks=ticks)
+    print(f'{ticks} ticks at {tps:.0f} ticks/s, level {game.level}, '
+          f'score {game.score}')
@@ -0,0 +1,50 @@
+from time import perf_counter
+import pygame
+
+# Events that start the next frame at once instead of at the frame deadline
+WAKE_EVENTS = (pygame.KEYDOWN, pygame.MOUSEBUTTONUP, pygame.QUIT)
+
+
+# Frame limiter for live play. Instead of sleeping out the rest of the
+# frame (pygame.time.Clock.tick) and reading input afterwards, it waits
+# on the event queue: every event is timestamped when it arrives, and a
+# key press starts the next frame immediately. The simulation uses fixed
+# steps, so irregular frame lengths do not change the game.
+class InputPacer:
+    def __init__(self, fps=60):
+        self.frame_s = 1 / fps
+        self.last = perf_counter()  # When the previous frame started
+
+    # Waits for the next frame; returns its length in ms and the input
+    # since the last frame as (arrival perf_counter(), event) pairs
+    def next_frame(self):
+        # Queued while the last frame was being made: assume they arrived
+        # when it started (the worst case)
+        events = [(self.last, event) for event in pygame.event.get()]
+        deadline = self.last + self.frame_s
+        while not any(event.type in WAKE_EVENTS for _, event in events):
+            left = deadline - perf_counter()
+            if left <= 0:
+                break
+            event = pygame.event.wait(max(1, round(left * 1000)))
+            if event.type != pygame.NOEVENT:
+                events.append((perf_counter(), event))
+        now = perf_counter()
+        frame_ms = (now - self.last) * 1000
+        self.last = now
+        return frame_ms, events
+
+
+# The same interface over any clock and event source (e.g. the virtual
+# clock and scripted input of headless runs); events are stamped when
+# they are read
+class PolledInput:
+    def __init__(self, events, clock, fps=60):
+        self.events = events
+        self.clock = clock
+        self.fps = fps
+
+    def next_frame(self):
+        frame_ms = self.clock.tick(self.fps)
+        now = perf_counter()
+        return frame_ms, [(now, event) for event in self.events.get()]
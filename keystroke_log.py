@@ -0,0 +1,125 @@
+import queue
+import struct
+import threading
+import time
+from array import array
+
+KEYLOG_PATH = 'keystrokes.bin'
+MAGIC = b'TDKL'
+VERSION = 1
+CHUNK_EVENTS = 4096
+# Chunk header: session start (epoch seconds), event count
+CHUNK_HEADER = struct.Struct('<dI')
+
+CORRECT = 1
+BACKSPACE = 2
+
+
+# One chunk of keystroke events as parallel preallocated arrays
+class _Chunk:
+    __slots__ = ('session_start', 'count', 'times', 'keys', 'words', 'flags')
+
+    def __init__(self, size):
+        self.session_start = 0.0
+        self.count = 0
+        self.times = array('d', bytes(8 * size))  # Seconds since session start
+        self.keys = array('I', bytes(4 * size))  # Unicode code point or key
+        self.words = array('i', bytes(4 * size))  # Target word id, -1 if none
+        self.flags = array('B', bytes(size))  # CORRECT | BACKSPACE
+
+    def to_bytes(self):
+        n = self.count
+        return b''.join((CHUNK_HEADER.pack(self.session_start, n),
+                         self.times[:n].tobytes(), self.keys[:n].tobytes(),
+                         self.words[:n].tobytes(), self.flags[:n].tobytes()))
+
+
+# Per-keystroke event stream. Events go into preallocated chunks; full
+# chunks are appended to an append-only binary file by a background thread
+# and then recycled, so logging never allocates or blocks on disk.
+class KeystrokeLog:
+    def __init__(self, path=KEYLOG_PATH, chunk_events=CHUNK_EVENTS, pool=4):
+        self.path = path
+        self.chunk_events = chunk_events
+        self.spare = queue.SimpleQueue()
+        for _ in range(pool - 1):
+            self.spare.put(_Chunk(chunk_events))
+        self.chunk = _Chunk(chunk_events)
+        self.pending = queue.SimpleQueue()
+        self.session_perf = time.perf_counter()
+        self.start_session(time.time())
+        self.writer = threading.Thread(target=self.write_chunks,
+                                       name='keystroke-log', daemon=True)
+        self.writer.start()
+
+    # Marks the start of a new session; later events are timed from here
+    def start_session(self, start_time):
+        if self.chunk.count:
+            self.hand_off()
+        self.chunk.session_start = start_time
+        self.session_perf = time.perf_counter()
+
+    def log(self, key, correct=False, backspace=False, word_id=-1):
+        chunk = self.chunk
+        i = chunk.count
+        chunk.times[i] = time.perf_counter() - self.session_perf
+        chunk.keys[i] = key
+        chunk.words[i] = word_id
+        chunk.flags[i] = (CORRECT if correct else 0) | \
+            (BACKSPACE if backspace else 0)
+        chunk.count = i + 1
+        if chunk.count == self.chunk_events:
+            self.hand_off()
+
+    # Queues the current chunk for writing and continues in a spare one
+    def hand_off(self):
+        full = self.chunk
+        try:
+            self.chunk = self.spare.get_nowait()
+        except queue.Empty:  # Writer is behind: grow the pool
+            self.chunk = _Chunk(self.chunk_events)
+        self.chunk.session_start = full.session_start
+        self.chunk.count = 0
+        self.pending.put(full)
+
+    def write_chunks(self):
+        with open(self.path, 'ab') as f:
+            if f.tell() == 0:
+                f.write(MAGIC + struct.pack('<H', VERSION))
+            while True:
+                chunk = self.pending.get()
+                if chunk is None:
+                    break
+                f.write(chunk.to_bytes())
+                f.flush()
+                chunk.count = 0
+                self.spare.put(chunk)
+
+    # Writes buffered events and stops the writer thread
+    def close(self):
+        if self.chunk.count:
+            self.hand_off()
+        self.pending.put(None)
+        self.writer.join()
+
+
+# Yields (session_start, seconds, key, correct, backspace, word_id)
+# for every event in a keystroke log file
+def read_keystrokes(path=KEYLOG_PATH):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a keystroke log')
+        f.read(2)  # Version
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                return
+            session_start, n = CHUNK_HEADER.unpack(header)
+            fields = []
+            for code, size in (('d', 8), ('I', 4), ('i', 4), ('B', 1)):
+                values = array(code)
+                values.frombytes(f.read(size * n))
+                fields.append(values)
+            for t, key, word, flags in zip(*fields):
+                yield (session_start, t, key, bool(flags & CORRECT),
+                       bool(flags & BACKSPACE), word)
@@ -0,0 +1,60 @@
+TOP, BOTTOM = 10, 650  # Range of word y positions (above the HUD bar)
+LANE_HEIGHT = 40  # One line of word text plus spacing
+GAP = 20  # Minimum horizontal space between words in a lane
+EXIT_X = -200  # Words are removed once x drops below this
+
+
+# Assigns each new word a lane (y) and an x offset so that it never
+# overlaps a word placed since the last reset (the rest of its wave),
+# neither when spawned nor later when a faster word catches up with a
+# slower one ahead of it.
+#
+# Words are hashed into horizontal lanes by y. Within a lane every new
+# word goes behind the others, so only two things constrain it: the
+# rightmost word end, and for each word ahead, the point where a faster
+# word would catch it before it leaves the screen. Those catch-up
+# constraints are kept as a short staircase of (width, exit time) pairs,
+# so placing a word costs O(lanes), independent of the number of words.
+class LaneLayout:
+    def __init__(self, measure=None):
+        self.measure = measure or (lambda text: 20 * len(text))
+        self.n_lanes = (BOTTOM - TOP) // LANE_HEIGHT + 1
+        self.reset()
+
+    def reset(self):
+        self.tail = [EXIT_X] * self.n_lanes  # Rightmost word end per lane
+        self.stairs = [[] for _ in range(self.n_lanes)]  # (width, exit time)
+
+    # Leftmost x where a word of this speed can go in lane
+    def required_x(self, lane, speed):
+        x = self.tail[lane] + GAP
+        for width, exit_time in self.stairs[lane]:
+            # Still behind the word ahead when that word leaves the screen
+            x = max(x, EXIT_X + width + speed * exit_time + GAP)
+        return x
+
+    def add(self, lane, x, width, speed):
+        self.tail[lane] = max(self.tail[lane], x + width)
+        exit_time = (x - EXIT_X) / speed
+        stairs = self.stairs[lane]
+        # Later words leave later; drop pairs the new one now dominates
+        while stairs and stairs[-1][0] <= width and stairs[-1][1] <= exit_time:
+            stairs.pop()
+        stairs.append((width, exit_time))
+
+    # Returns (x, y) for a new word. desired_x is used when that lane has
+    # room there; lanes are tried from first_lane onwards, and if none has
+    # room the word goes as far left as any lane allows.
+    def place(self, text, speed, desired_x, first_lane=0):
+        width = self.measure(text)
+        best_lane, best_x = None, None
+        for i in range(self.n_lanes):
+            lane = (first_lane + i) % self.n_lanes
+            x = self.required_x(lane, speed)
+            if x <= desired_x:
+                best_lane, best_x = lane, desired_x
+                break
+            if best_x is None or x < best_x:
+                best_lane, best_x = lane, x
+        self.add(best_lane, best_x, width, speed)
+        return int(best_x + 0.999), TOP + best_lane * LANE_HEIGHT
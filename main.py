@@ -1,143 +1,303 @@
+import startup  # First, so the startup timeline covers all imports
+import app
 from app import Dataset, Menu
-from Tracker import Tracker
-from statistic_page import StatPage
+from Tracker import Tracker, LIVE_WINDOW
+from session import GameSession, SIM_STEP_MS
+from frame_stats import FrameProfiler
+from keystroke_log import KeystrokeLog
+from session_store import SessionWriter
+from replay import Recorder
+from input_pacer import InputPacer, PolledInput
+from wave_pipeline import WavePipeline
+from time import perf_counter
+import os
+import secrets
+import time
+import subprocess
+import sys
 import pygame
 
-class Game:
-    def __init__(self):
-        self.dataset = Dataset()  # Manages word data
+
+# The playable game: a GameSession with a window, menus and an event loop
+class Game(GameSession):
+    # headless: run without a window (SDL dummy driver)
+    # render: draw frames at all; False skips every draw call
+    # events/clock: input source and clock, defaulting to pygame's own
+    # seed: word/wave randomness (random if None); record_path: file the
+    # session's replay is written to on exit; fsync: durability of saved
+    # sessions ('off', 'normal' or 'full', see SessionWriter)
+    def __init__(self, headless=False, render=True, events=None, clock=None,
+                 save_stats=True, profile_path=None, corpus=None, seed=None,
+                 record_path=None, fsync='normal'):
+        self.screen = app.init_display(headless)
+        startup.mark('display')
+        self.render = render
+        self.events = events if events is not None else pygame.event
+        self.clock = clock if clock is not None else app.timer
+        # Live play waits on the event queue; other sources are polled
+        if events is None and clock is None:
+            self.input = InputPacer()
+        else:
+            self.input = PolledInput(self.events, self.clock)
+        self.key_times = []  # Arrival times of the keys applied this frame
+        self.save_stats = save_stats
+        self.profiler = FrameProfiler()  # Per-phase frame times, F3 overlay
+        self.profile_path = profile_path  # Sample dump written on exit
+        if seed is None:
+            seed = secrets.randbits(64)
+        self.font = app.word_font()
+        dataset = Dataset(seed, corpus)
+        # The next waves are generated on a worker thread, so a level-up
+        # only hands finished words to the frame. The worker measures words
+        # with a Font of its own; self.font is only used on this thread.
+        measure_font = app.word_font()
+        dataset.layout.measure = lambda text: measure_font.size(text)[0]
+        waves = WavePipeline(dataset, depth=2, background=True)
+        # Per-keystroke events are only logged for real (saved) sessions
+        super().__init__(dataset, KeystrokeLog() if save_stats else None,
+                         epoch=time.time(), waves=waves)
+        startup.mark('dataset')
         self.menu = Menu()  # Manages UI and menu
-        self.tracker = Tracker()
-        self.font = pygame.font.SysFont(None, 48)
-        self.score = 0
-        self.level = 1
-        self.lives = 5
-        self.active_string = ''  # Current typed input
-        self.submit = ''  # Word submitted (Enter or Space)
-        self.word_objects = []  # List of active Enemy objects
+        self.profiler_font = pygame.font.SysFont(None, 22)
         self.pause = True
-        self.new_level = True
-        self.choices = [False, False, True, True, False, False,
-                        False]  # Word lengths toggle
-        self.high_score_ = self.tracker.read_csv('statistics.csv')
-        self.high_score = self.high_score_['Score'].max()
-        self.count = 0
-
-    def check_answer(self):
-        matched = False
-        for wrd in self.word_objects:
-            if wrd.text == self.submit:
-                points = wrd.speed * len(wrd.text) * 10 * (len(wrd.text) / 4)
-                self.score += int(points)
-                self.word_objects.remove(wrd)
-                matched = True
-                self.tracker.add_word(wrd.text)
-                break
-        if not matched:
-            self.tracker.add_error()
-
-    # Main game loop
+        # Dirty-rectangle rendering state
+        self.full_redraw = True  # Repaint and flip the whole screen
+        self.paint = True  # Game layer (HUD + words) is drawn this frame
+        self.drawn_rects = []  # Word areas drawn last frame, erased next
+        self.dirty = []  # Screen regions changed this frame
+        self.pause_base = None  # Frame under the pause panel
+        self.pause_scene = None  # State pause_base was drawn from
+        # Saved session history; unsaved runs (e.g. headless load runs on
+        # build machines) neither read nor create it
+        self.store = Tracker.open_store() if save_stats else None
+        self.stats_process = None  # Statistics viewer, run out of process
+        self.high_score = (self.store.best_score() if self.store is not None
+                           else 0)
+        # Sessions are saved by a worker thread, never on the game thread
+        self.session_writer = (SessionWriter(fsync=fsync) if save_stats
+                               else None)
+        self.record_path = record_path
+        self.recorder = (Recorder(self, seed, corpus) if record_path
+                         else None)
+        startup.mark('game_ready')
+
+    # Rolling WPM and accuracy line shown under the typed input
+    def live_stats(self):
+        return (f'{self.tracker.live_wpm():.0f} WPM   '
+                f'{self.tracker.live_accuracy():.0f}% accuracy   '
+                f'(last {LIVE_WINDOW} s)')
+
+    # Decides what to repaint this frame. Returns the rects restored from
+    # the background, or None when the whole screen is repainted.
+    def begin_frame(self):
+        self.dirty = []
+        if self.profiler.show_overlay:
+            self.full_redraw = True
+        if self.pause:
+            scene = (self.active_string, self.level, self.score,
+                     self.high_score, self.lives, len(self.word_objects))
+            # While paused nothing moves: keep the frame under the panel
+            # and only redraw the buttons until the scene changes
+            self.paint = (self.full_redraw or self.pause_base is None
+                          or scene != self.pause_scene)
+            self.pause_scene = scene
+            if self.paint:
+                self.full_redraw = True
+        else:
+            if self.pause_base is not None:
+                self.pause_base = None
+                self.full_redraw = True  # Remove the pause panel
+            self.paint = True
+        erased = None
+        if self.full_redraw:
+            self.screen.blit(self.menu.background, (0, 0))
+        elif self.paint:
+            erased = self.drawn_rects
+            for rect in erased:
+                self.screen.blit(self.menu.background, rect, rect)
+            self.dirty.extend(erased)
+        if self.paint:
+            self.drawn_rects = []
+        return erased
+
+    # Pushes this frame's changes to the display
+    def present(self):
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        elif self.dirty:
+            pygame.display.update(self.dirty)
+
+    # Starts the statistics viewer in its own process (at most one), so the
+    # Tk main loop never blocks the game loop. It follows the session
+    # store and refreshes itself as new sessions are saved.
+    def open_stats(self):
+        if self.stats_process is not None and self.stats_process.poll() is None:
+            return
+        viewer = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'statistic_page.py')
+        self.stats_process = subprocess.Popen([sys.executable, viewer])
+
+    # Closes the statistics viewer, if it is still open
+    def close_stats(self):
+        if self.stats_process is None or self.stats_process.poll() is not None:
+            return
+        self.stats_process.terminate()
+        try:
+            self.stats_process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.stats_process.kill()
+
+    # Main game loop. Input comes first in each frame, so a key press is
+    # applied, drawn and presented in the frame it arrives in.
     def run(self):
         running = True
         changes = None
+        prof = self.profiler
         while running:
-            screen.fill('gray')
-            timer.tick(60)
-            pause_click = self.menu.draw_hud(self.level, self.active_string,
-                                             self.score, self.high_score,
-                                             self.lives)
-
-            if self.pause:
-                resume, changes, quit_btn, stat_btn = self.menu.draw_pause(
-                    self.choices)
-                if resume:
-                    self.pause = False
-                if quit_btn:
-                    break
-                if stat_btn:
-                    StatPage()
-                self.choices = changes
-
-            if self.new_level and not self.pause:
-                self.word_objects = self.dataset.get_words(self.level,
-                                                           self.choices)
-                for _ in self.word_objects:  # Track all newly spawned words
-                    self.tracker.add_shown_word()
-                self.new_level = False
-            else:
-                for word in self.word_objects[:]:
-                    word.draw(self.font, self.active_string)
-                    if not self.pause:
-                        word.update()
-                    if word.x_pos < -200:
-                        self.tracker.add_missed_word()  # Track expired words
-                        self.word_objects.remove(word)
-                        self.lives -= 1
-
-            if len(self.word_objects) <= 0 and not self.pause:
-                self.level += 1
-                self.new_level = True
-
-            if self.submit:
-                self.check_answer()
-                self.submit = ''
+            frame_ms, events = self.input.next_frame()
+            if self.recorder is not None:
+                self.recorder.frame(frame_ms)
 
-            for event in pygame.event.get():
+            start = perf_counter()
+            for arrived, event in events:
                 if event.type == pygame.QUIT:
                     running = False
 
                 if event.type == pygame.KEYDOWN:
-                    # Track all keystrokes
-                    if event.key == pygame.K_BACKSPACE:
-                        self.tracker.add_keystroke(is_backspace=True)
-                        self.active_string = self.active_string[:-1]
-                    elif not self.pause:
-                        self.tracker.add_keystroke()  # Count all keypresses
-
-                        if event.unicode.isalpha():
-                            # Check if keystroke matches any active word
-                            is_correct = any(
-                                word.text.startswith(
-                                    self.active_string + event.unicode)
-                                for word in self.word_objects
-                            )
-                            self.tracker.add_keystroke(correct=is_correct)
-                            self.active_string += event.unicode
-
-                        if event.key in [pygame.K_RETURN, pygame.K_SPACE]:
-                            self.submit = self.active_string
-                            self.active_string = ''
+                    if event.key == pygame.K_BACKSPACE or not self.pause:
+                        self.key_down(event.key, event.unicode)
+                        self.key_times.append(arrived)
+                        if self.recorder is not None:
+                            self.recorder.key(event.key, event.unicode)
 
                     if event.key == pygame.K_ESCAPE:
                         self.pause = not self.pause
+                    if event.key == pygame.K_F3:
+                        prof.show_overlay = not prof.show_overlay
+                        self.full_redraw = True
 
-                if event.type == pygame.MOUSEBUTTONUP and self.pause and event.button == 1:
+                # Word lengths only change when the button is released, so
+                # holding it down does not queue a wave per frame
+                if (event.type == pygame.MOUSEBUTTONUP and self.pause
+                        and event.button == 1 and changes is not None):
                     self.choices = changes
+            prof.record('events', start)
+
+            if self.submit:
+                start = perf_counter()
+                self.check_answer()
+                prof.record('check_answer', start)
+                self.submit = ''
+            if self.recorder is not None:
+                self.recorder.state(self.pause, self.choices, 0)
+
+            erased = self.begin_frame() if self.render else None
+            start = perf_counter()
+            pause_click = self.render and self.paint and self.menu.draw_hud(
+                self.level, self.active_string, self.score, self.high_score,
+                self.lives, erased, self.live_stats())
+            if self.render and self.paint:
+                self.dirty.extend(self.menu.hud_dirty)
+            prof.record('draw_hud', start)
+
+            start = perf_counter()
+            spawned = self.update(frame_ms)
+            if self.render and self.paint and not spawned:
+                # Draw between the last two steps for smooth motion
+                alpha = self.sim_time / SIM_STEP_MS
+                for word, x in self.word_objects.interpolated(alpha):
+                    self.drawn_rects.append(
+                        word.draw(self.font, self.active_string, x))
+            prof.record('enemies', start)
+
+            if self.render and self.paint and not self.full_redraw:
+                self.dirty.extend(self.drawn_rects)
+
+            # Drawn after the words so the panel stays on top of them
+            if self.pause:
+                if self.render:
+                    start = perf_counter()
+                    if self.paint:
+                        self.pause_base = self.screen.copy()
+                        resume, changes, quit_btn, stat_btn = \
+                            self.menu.draw_pause(self.choices)
+                    else:
+                        resume, changes, quit_btn, stat_btn = \
+                            self.menu.draw_pause(self.choices,
+                                                 self.pause_base)
+                        self.dirty.extend(self.menu.pause_dirty)
+                    prof.record('draw_pause', start)
+                else:
+                    resume = quit_btn = stat_btn = False
+                    changes = self.choices
+                if resume:
+                    self.pause = False
+                if quit_btn:
+                    break
+                if stat_btn:
+                    self.open_stats()
 
             if pause_click:
                 self.pause = True
 
-            if self.lives <= 0:
-                if self.count == 0:
-                    self.tracker.save_to_csv(self.score)
-                self.count = 1
-                self.tracker.reset()
+            if self.game_over():
+                if self.session_writer is not None:
+                    self.tracker.save_session(self.score,
+                                              self.session_writer)
+                if self.recorder is not None:
+                    self.recorder.game_over(
+                        self.tracker.session_row(self.score))
+                self.high_score = max(self.high_score, self.score)
+                self.restart()
                 self.pause = True
-                self.level = 1
-                self.lives = 5
-                self.word_objects = []
-                self.new_level = True
-                self.score = 0
+            if self.recorder is not None:
+                self.recorder.state(self.pause, self.choices, 1)
 
-            pygame.display.flip()
+            if self.render:
+                prof.draw_overlay(self.screen, self.profiler_font)
+                start = perf_counter()
+                self.present()
+                startup.mark('first_frame')
+                prof.record('flip', start)
+                # Key press to presented frame, for this frame's keys
+                presented = perf_counter()
+                for arrived in self.key_times:
+                    self.tracker.add_latency((presented - arrived) * 1000)
+                # Spread rendering the coming waves' words over frames
+                self.waves.prerender(self.font)
+            self.key_times.clear()
 
+        self.waves.close()
+        self.close_stats()
+        if self.profile_path:
+            self.profiler.dump(self.profile_path)
+        if self.recorder is not None:
+            self.recorder.save(self.record_path, self)
+        if self.store is not None:
+            self.store.close()
+        if self.session_writer is not None:
+            self.session_writer.close()  # Flush queued sessions
+        if self.tracker.keylog is not None:
+            self.tracker.keylog.close()
         pygame.quit()
 
 
 if __name__ == '__main__':
-    WIDTH, HEIGHT = 1000, 800
-    screen = pygame.display.set_mode([WIDTH, HEIGHT])
-    pygame.display.set_caption('Type Defender')
-    timer = pygame.time.Clock()
-    Game().run()
+    # python main.py --profile frame_times.csv dumps frame timings on exit
+    # python main.py --corpus words.txt plays with a custom word list
+    # python main.py --record game.json saves a replay (see replay.py)
+    # python main.py --fsync full fsyncs every saved session
+    profile_path = corpus = record_path = None
+    fsync = 'normal'
+    if '--profile' in sys.argv[1:-1]:
+        profile_path = sys.argv[sys.argv.index('--profile') + 1]
+    if '--corpus' in sys.argv[1:-1]:
+        corpus = sys.argv[sys.argv.index('--corpus') + 1]
+    if '--record' in sys.argv[1:-1]:
+        record_path = sys.argv[sys.argv.index('--record') + 1]
+    if '--fsync' in sys.argv[1:-1]:
+        fsync = sys.argv[sys.argv.index('--fsync') + 1]
+    Game(profile_path=profile_path, corpus=corpus,
+         record_path=record_path, fsync=fsync).run()
 
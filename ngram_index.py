@@ -0,0 +1,91 @@
+import numpy as np
+
+
+# Inverted index from character n-grams to the ids of the words containing
+# them. Postings are sorted id arrays, and since length buckets are
+# contiguous id ranges, a bucket's slice of a posting list is found with
+# two binary searches. Built once from the corpus text with NumPy.
+class NgramIndex:
+    def __init__(self, corpus, n=2):
+        self.n = n
+        data, offsets = self.encode(corpus)
+        codes, ids = self.ngram_codes(data, offsets, n)
+        # One posting per (n-gram, word) pair, grouped by n-gram code
+        pairs = np.unique(codes * len(offsets) + ids)
+        codes, ids = np.divmod(pairs, len(offsets))
+        self.keys, self.starts = np.unique(codes, return_index=True)
+        self.starts = np.append(self.starts, len(codes))
+        self.ids = ids
+        self.tables = {}  # (grams, buckets) -> span starts and weights
+
+    # Lowercased UTF-8 bytes of every word and the word start offsets
+    @staticmethod
+    def encode(corpus):
+        if hasattr(corpus, 'blob'):  # Packed corpus: use the mapped text
+            data = np.frombuffer(corpus.blob, dtype=np.uint8)
+            offsets = np.frombuffer(corpus.offsets, dtype=np.uint32)
+        else:
+            encoded = [corpus[i].encode('utf-8') for i in range(len(corpus))]
+            data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+            offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+            np.cumsum([len(word) for word in encoded], out=offsets[1:])
+        upper = (data >= ord('A')) & (data <= ord('Z'))
+        return np.where(upper, data + 32, data), offsets[:-1]
+
+    # Base-256 code of every n-gram that lies inside a word, and its word id
+    @staticmethod
+    def ngram_codes(data, offsets, n):
+        lengths = np.diff(np.append(offsets, len(data)))
+        word_of = np.repeat(np.arange(len(offsets)), lengths)
+        end = len(data) - n + 1
+        if end <= 0:
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        codes = np.zeros(end, dtype=np.int64)
+        for k in range(n):
+            codes = codes * 256 + data[k:k + end]
+        inside = word_of[:end] == word_of[n - 1:]
+        return codes[inside], word_of[:end][inside]
+
+    def code(self, gram):
+        code = 0
+        for byte in gram.lower().encode('utf-8'):
+            code = code * 256 + byte
+        return code
+
+    # Start and stop (into self.ids) of gram's postings within word ids
+    # [first, stop)
+    def span(self, gram, first, stop):
+        encoded = gram.lower().encode('utf-8')
+        if len(encoded) != self.n:
+            return 0, 0
+        key = self.code(gram)
+        pos = np.searchsorted(self.keys, key)
+        if pos == len(self.keys) or self.keys[pos] != key:
+            return 0, 0
+        lo, hi = self.starts[pos], self.starts[pos + 1]
+        ids = self.ids[lo:hi]
+        return (lo + np.searchsorted(ids, first),
+                lo + np.searchsorted(ids, stop))
+
+    # k word ids containing one of grams, from the (first, stop) id ranges
+    # in buckets; every matching (gram, word) pair is equally likely.
+    # Returns an empty array when no word matches.
+    def sample(self, rng, k, grams, buckets):
+        key = (tuple(grams), tuple(buckets))
+        table = self.tables.get(key)
+        if table is None:
+            if len(self.tables) >= 64:
+                self.tables.clear()
+            spans = [self.span(gram, first, stop)
+                     for gram in grams for first, stop in buckets]
+            spans = [(lo, hi) for lo, hi in spans if hi > lo]
+            starts = np.array([lo for lo, _ in spans], dtype=np.int64)
+            sizes = np.array([hi - lo for lo, hi in spans], dtype=np.int64)
+            cumulative = np.cumsum(sizes)
+            table = self.tables[key] = (starts, cumulative, cumulative - sizes)
+        starts, cumulative, before = table
+        if not len(cumulative):
+            return np.empty(0, dtype=np.int64)
+        draws = rng.integers(0, cumulative[-1], k)
+        span = np.searchsorted(cumulative, draws, side='right')
+        return self.ids[starts[span] + draws - before[span]]
@@ -0,0 +1,179 @@
+import base64
+import json
+import time
+import zlib
+import numpy as np
+from session_store import LATENCY_COLUMNS
+
+REPLAY_VERSION = 2
+LATENCY_METRICS = {name for name, _ in LATENCY_COLUMNS}
+
+
+# Records a session as its seed, the time of every frame and the inputs
+# the rules saw: keys that reached GameSession.key_down, and pause and
+# word-length changes, noted after the frame's input (phase 0) and at the
+# end of the frame (phase 1). Mouse clicks and menus are not recorded,
+# only their effect.
+class Recorder:
+    def __init__(self, session, seed, corpus=None):
+        self.header = {
+            'version': REPLAY_VERSION,
+            'seed': seed,
+            'corpus': corpus,
+            'epoch': session.epoch,
+            'lives': session.start_lives,
+            'prefetch': session.waves.depth,  # Waves generated ahead
+            'pause': session.pause,
+            'choices': list(session.choices),
+        }
+        self.frames = []  # Frame times in ms
+        self.keys = []  # [frame, key, char]
+        self.states = []  # [frame, phase, pause, choices bit mask]
+        self.results = []  # Session rows of the finished games
+        self.pause = session.pause
+        self.choices = list(session.choices)
+
+    def frame(self, frame_ms):
+        self.frames.append(frame_ms)
+
+    def key(self, key, char):
+        self.keys.append([len(self.frames) - 1, key, char])
+
+    def game_over(self, row):
+        self.results.append(row)
+
+    # Called after the input of every frame (phase 0) and at its end
+    # (phase 1)
+    def state(self, pause, choices, phase):
+        if pause != self.pause or choices != self.choices:
+            self.pause = pause
+            self.choices = list(choices)
+            self.states.append([len(self.frames) - 1, phase, int(pause),
+                                choices_mask(choices)])
+
+    def save(self, path, session):
+        frames = np.asarray(self.frames, dtype='<f8').tobytes()
+        recording = dict(self.header, **{
+            'frames': base64.b64encode(zlib.compress(frames, 9)).decode(),
+            'keys': self.keys,
+            'states': self.states,
+            'results': self.results,
+            'final': final_state(session),
+        })
+        with open(path, 'w') as f:
+            json.dump(recording, f, separators=(',', ':'))
+
+
+def choices_mask(choices):
+    return sum(1 << i for i, chosen in enumerate(choices) if chosen)
+
+
+def mask_choices(mask, n):
+    return [bool(mask >> i & 1) for i in range(n)]
+
+
+# What a replay must reproduce of the session left running at the end
+def final_state(session):
+    return {'score': session.score, 'level': session.level,
+            'lives': session.lives,
+            'stats': session.tracker.session_row(session.score)}
+
+
+# What must match between a recording and its replay: the session rows
+# and final state, without the latency columns, which measure the machine
+# the game ran on rather than the game
+def outcome(results, final):
+    rows = [{name: value for name, value in row.items()
+             if name not in LATENCY_METRICS}
+            for row in results + [final['stats']]]
+    return rows, final['score'], final['level'], final['lives']
+
+
+def decode_frames(recording):
+    return np.frombuffer(zlib.decompress(base64.b64decode(
+        recording['frames'])), dtype='<f8').tolist()
+
+
+def load(path):
+    with open(path) as f:
+        recording = json.load(f)
+    if recording.get('version') != REPLAY_VERSION:
+        raise ValueError(f'{path} is not a version {REPLAY_VERSION} replay')
+    return recording
+
+
+# Plays a recording back on a GameSession, as fast as possible and
+# without rendering. Returns (results, final) in the same form as the
+# recording's, for comparing with it.
+def replay(recording, dataset=None):
+    from app import Dataset, word_font
+    from session import GameSession
+    from wave_pipeline import WavePipeline
+    if dataset is None:
+        dataset = Dataset(corpus=recording['corpus'])
+        font = word_font()  # Word widths decide the lane layout
+        dataset.layout.measure = lambda text: font.size(text)[0]
+    dataset.reseed(recording['seed'])
+    # Generated ahead as in the game, but in line: the same waves result
+    waves = WavePipeline(dataset, depth=recording.get('prefetch', 0))
+    session = GameSession(dataset, lives=recording['lives'],
+                          epoch=recording['epoch'], waves=waves)
+    session.pause = recording['pause']
+    session.choices = list(recording['choices'])
+    frames = decode_frames(recording)
+    keys, states = recording['keys'], recording['states']
+    key_pos = state_pos = 0
+    results = []
+    def apply_states(i, phase):
+        nonlocal state_pos
+        while (state_pos < len(states) and states[state_pos][0] == i
+               and states[state_pos][1] == phase):
+            session.pause = bool(states[state_pos][2])
+            session.choices = mask_choices(states[state_pos][3],
+                                           len(session.choices))
+            state_pos += 1
+
+    # Same order as Game.run: input, answer check, rules, game over
+    for i, frame_ms in enumerate(frames):
+        while key_pos < len(keys) and keys[key_pos][0] == i:
+            session.key_down(keys[key_pos][1], keys[key_pos][2])
+            key_pos += 1
+        if session.submit:
+            session.check_answer()
+            session.submit = ''
+        apply_states(i, 0)
+        session.update(frame_ms)
+        if session.game_over():
+            results.append(session.tracker.session_row(session.score))
+            session.restart()
+            session.pause = True
+        apply_states(i, 1)
+    return results, final_state(session)
+
+
+# Replays path and checks it reproduces the recorded games exactly.
+# Returns (matches, replayed ms of game time per ms of real time).
+def verify(path, dataset=None):
+    recording = load(path)
+    start = time.perf_counter()
+    results, final = replay(recording, dataset)
+    elapsed = (time.perf_counter() - start) * 1000
+    # Through JSON so tuples, floats and ints compare like the recording
+    replayed = json.loads(json.dumps({'results': results, 'final': final}))
+    matches = (outcome(replayed['results'], replayed['final'])
+               == outcome(recording['results'], recording['final']))
+    game_ms = sum(decode_frames(recording))
+    return matches, game_ms / elapsed if elapsed > 0 else 0
+
+
+if __name__ == '__main__':
+    # python replay.py rec1.json [rec2.json ...] replays each recording
+    # headless and exits with status 1 if any outcome differs
+    import sys
+    failed = 0
+    for path in sys.argv[1:]:
+        matches, speedup = verify(path)
+        failed += not matches
+        print(f'{path}: {"same outcome" if matches else "DIFFERENT OUTCOME"}'
+              f' ({speedup:.0f}x real time)')
+    sys.exit(1 if failed else 0)
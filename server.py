@@ -0,0 +1,260 @@
+import asyncio
+import json
+import time
+from time import perf_counter
+import pygame
+from app import Dataset, EnemyStore, EnemyGroup, word_font
+from frame_stats import FrameProfiler
+from session import GameSession, SIM_STEP_MS, MAX_STEPS_PER_FRAME
+
+PORT = 7411
+TICK_MS = 1000 / 30  # Server tick; words still move in SIM_STEP_MS steps
+MAX_PENDING_KEYS = 4096  # Per tick; a client sending more is dropped
+MAX_OUTPUT = 256 * 1024  # Unsent bytes before a stalled client is dropped
+SERVER_PHASES = ('step', 'sessions')
+# Raw input bytes that are not typed characters
+KEYS = {ord('\n'): pygame.K_RETURN, ord(' '): pygame.K_SPACE,
+        0x08: pygame.K_BACKSPACE, 0x7f: pygame.K_BACKSPACE}
+
+# Protocol: the client sends raw keystrokes (letters type, space or
+# newline submits, backspace or DEL deletes; '\r' is ignored, so telnet
+# and nc work). The server sends one JSON object per line:
+#   {"wave": level, "words": [[text, x, y, speed], ...]}  words arrive at x
+#       and move left by speed pixels every 1/60 s
+#   {"hit": text, "score": score}     {"wrong": text}
+#   {"miss": text, "lives": lives}    {"over": score, "level": level}
+# after "over" a new game starts with the next "wave".
+
+
+# One connected player: a GameSession plus the keystrokes received since
+# the last tick and the messages to send at the end of this one
+class Player(asyncio.Protocol):
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.session = None
+        self.keys = bytearray()  # Input received since the last tick
+        self.out = []  # Encoded messages for this tick
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.join(self)
+
+    def data_received(self, data):
+        self.keys += data
+        if len(self.keys) > MAX_PENDING_KEYS:
+            self.transport.close()
+
+    def connection_lost(self, exc):
+        self.server.leave(self)
+
+    def send(self, message):
+        self.out.append(json.dumps(message, separators=(',', ':')))
+
+    # Writes this tick's messages in one write
+    def flush(self):
+        if not self.out:
+            return
+        self.transport.write(('\n'.join(self.out) + '\n').encode())
+        self.out.clear()
+        if self.transport.get_write_buffer_size() > MAX_OUTPUT:
+            self.transport.close()
+
+
+# Runs many GameSessions on one event loop. All sessions keep their words
+# in one shared EnemyStore, so a single vectorized step per tick moves
+# every word in the server; the per-session work in a tick is applying
+# that session's batched keystrokes and sending its messages.
+class GameServer:
+    def __init__(self, dataset=None, lives=GameSession.START_LIVES,
+                 tick_ms=TICK_MS):
+        if dataset is None:
+            dataset = Dataset()
+            font = word_font()
+            dataset.layout.measure = lambda text: font.size(text)[0]
+        self.dataset = dataset  # Shared word data and layout
+        dataset.load_ngrams()  # Not in the middle of a tick
+        self.lives = lives
+        self.tick_ms = tick_ms
+        self.store = EnemyStore(1024)  # Words of all sessions
+        self.players = {}  # Player -> None, in join order
+        self.sim_time = 0  # Unsimulated milliseconds carried between ticks
+        self.profiler = FrameProfiler(phases=SERVER_PHASES)
+        self.server = None
+
+    def join(self, player):
+        player.session = GameSession(
+            self.dataset, lives=self.lives, epoch=time.time(),
+            store=EnemyGroup(self.store, owner=player))
+        self.players[player] = None
+
+    def leave(self, player):
+        if player in self.players:
+            del self.players[player]
+            player.session.spawn_words([])  # Free its words' slots
+
+    # Moves the words of every session, SIM_STEP_MS at a time
+    def step(self, frame_ms):
+        self.sim_time += frame_ms
+        steps = 0
+        while self.sim_time >= SIM_STEP_MS:
+            if steps == MAX_STEPS_PER_FRAME:
+                self.sim_time = 0
+                break
+            self.sim_time -= SIM_STEP_MS
+            steps += 1
+        if not steps:
+            return
+        for word in self.store.step(steps):
+            group = word.group
+            group.discard(word)
+            player = group.owner
+            player.session.expire([word])
+            player.send({'miss': word.text, 'lives': player.session.lives})
+
+    # Applies a player's keystrokes received since the last tick
+    def apply_keys(self, player):
+        session = player.session
+        keys = bytes(player.keys)
+        player.keys.clear()
+        for byte in keys:
+            if byte == ord('\r'):
+                continue
+            key = KEYS.get(byte)
+            char = chr(byte) if key is None else ''
+            if key is None:
+                if not char.isalpha():
+                    continue
+                key = ord(char.lower())
+            session.key_down(key, char)
+            if session.submit:
+                text, score = session.submit, session.score
+                session.check_answer()
+                session.submit = ''
+                if session.score != score:
+                    player.send({'hit': text, 'score': session.score})
+                else:
+                    player.send({'wrong': text})
+
+    def tick(self, frame_ms):
+        prof = self.profiler
+        start = perf_counter()
+        self.step(frame_ms)
+        prof.record('step', start)
+        start = perf_counter()
+        for player in list(self.players):
+            session = player.session
+            session.time_ms += frame_ms
+            if session.new_level:
+                session.spawn_wave()
+                player.send({'wave': session.level, 'words': [
+                    [word.text, word.x_pos, word.y_pos, word.speed]
+                    for word in session.word_objects]})
+            if player.keys:
+                self.apply_keys(player)
+            session.check_level()
+            if session.game_over():
+                player.send({'over': session.score, 'level': session.level})
+                session.restart()
+            player.flush()
+        prof.record('sessions', start)
+
+    # Shared tick scheduler: ticks every tick_ms on the loop's clock,
+    # passing the time actually elapsed so late ticks catch up
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        last = next_tick = loop.time()
+        while True:
+            next_tick += self.tick_ms / 1000
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+            now = loop.time()
+            self.tick((now - last) * 1000)
+            last = now
+            if now - next_tick > 1:  # Far behind: skip ahead, don't burst
+                next_tick = now
+
+    async def serve(self, host='127.0.0.1', port=PORT, report_every=10):
+        loop = asyncio.get_running_loop()
+        self.server = await loop.create_server(lambda: Player(self),
+                                               host, port)
+        ticker = asyncio.create_task(self.run_ticks())
+        try:
+            while True:
+                await asyncio.sleep(report_every)
+                self.report()
+        finally:
+            ticker.cancel()
+            self.server.close()
+
+    def report(self):
+        step = self.profiler.summary('step')
+        sessions = self.profiler.summary('sessions')
+        if sessions is None:
+            return
+        print(f'{len(self.players)} players, {len(self.store)} words; '
+              f'tick p50 {step[0] + sessions[0]:.2f} ms, '
+              f'p99 {step[1] + sessions[1]:.2f} ms', flush=True)
+
+
+# A socket client that plays like a typist of the given speed, for load
+# tests: it types the wave's words in order of arrival at the left edge
+async def bot_client(host='127.0.0.1', port=PORT, wpm=60, games=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    words = {}  # Live word text -> seconds until it expires
+    key_s = 60 / (wpm * 5)
+    played = 0
+
+    async def read():
+        nonlocal played
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            message = json.loads(line)
+            if 'wave' in message:
+                now = time.monotonic()
+                for text, x, _, speed in message['words']:
+                    words[text] = now + (x + 200) / (speed * 60)
+            elif 'hit' in message or 'wrong' in message:
+                words.pop(message.get('hit') or message.get('wrong'), None)
+            elif 'miss' in message:
+                words.pop(message['miss'], None)
+            elif 'over' in message:
+                words.clear()
+                played += 1
+                if games is not None and played >= games:
+                    return
+
+    reading = asyncio.create_task(read())
+    try:
+        while not reading.done():
+            if not words:
+                await asyncio.sleep(0.1)
+                continue
+            target = min(words, key=words.get)
+            for char in target + ' ':
+                writer.write(char.encode())
+                await asyncio.sleep(key_s)
+            words.pop(target, None)
+    finally:
+        reading.cancel()
+        writer.close()
+
+
+if __name__ == '__main__':
+    # python server.py [port]              serve games on localhost
+    # python server.py bots N [wpm] [port] connect N bot players
+    import sys
+    args = sys.argv[1:]
+    if args[:1] == ['bots']:
+        count = int(args[1])
+        wpm = float(args[2]) if len(args) > 2 else 60
+        port = int(args[3]) if len(args) > 3 else PORT
+
+        async def run_bots():
+            await asyncio.gather(*(bot_client(port=port, wpm=wpm)
+                                   for _ in range(count)))
+        asyncio.run(run_bots())
+    else:
+        port = int(args[0]) if args else PORT
+        asyncio.run(GameServer().serve(port=port))
@@ -0,0 +1,174 @@
+import pygame
+from app import EnemyStore
+from Tracker import Tracker
+from wave_pipeline import WavePipeline
+from word_index import WordIndex
+
+SIM_STEP_MS = 1000 / 60  # Fixed simulation timestep
+MAX_STEPS_PER_FRAME = 5  # Drop simulated time beyond this after a stall
+
+
+# The game rules without any rendering or input device: words, scoring,
+# lives and levels, driven by key presses and frame times. main.Game adds
+# the window, menus and event loop on top; bots, batch simulations and
+# replays drive it directly. Tracker reads the session's own clock (epoch
+# plus the frame times so far), so the same seed, frame times and keys
+# always give the same game and the same stats.
+class GameSession:
+    START_LIVES = 5
+    POINTS_SCALE = 10  # Points per character, before speed and length
+
+    # store: where the words live, an EnemyStore of its own by default
+    # waves: WavePipeline making the waves (by default each one on spawn)
+    def __init__(self, dataset, keylog=None, lives=START_LIVES, epoch=0.0,
+                 store=None, waves=None):
+        self.dataset = dataset  # Manages word data
+        self.waves = waves if waves is not None else WavePipeline(dataset)
+        self.epoch = epoch  # Clock value when the session started
+        self.time_ms = 0  # Frame time elapsed since epoch
+        self.tracker = Tracker(keylog, clock=self.now)
+        self.start_lives = lives
+        self.score = 0
+        self.level = 1
+        self.lives = lives
+        self.active_string = ''  # Current typed input
+        self.submit = ''  # Word submitted (Enter or Space)
+        # Active Enemy objects
+        self.word_objects = store if store is not None else EnemyStore()
+        self.sim_time = 0  # Unsimulated milliseconds carried between frames
+        self.word_index = WordIndex()  # Prefix/text lookup over word_objects
+        self.new_level = True
+        self.pause = False  # Paused: words stand still, typing is ignored
+        self.choices = [False, False, True, True, False, False,
+                        False]  # Word lengths toggle
+
+    # Session time in seconds
+    def now(self):
+        return self.epoch + self.time_ms / 1000
+
+    def points(self, wrd):
+        return int(wrd.speed * len(wrd.text) * self.POINTS_SCALE
+                   * (len(wrd.text) / 4))
+
+    def check_answer(self):
+        wrd = self.word_index.pop(self.submit)
+        if wrd is not None:
+            self.score += self.points(wrd)
+            self.word_objects.remove(wrd)
+            self.tracker.add_word(wrd.text)
+        else:
+            self.tracker.add_error()
+
+    # Replace the words on screen and rebuild the index over them
+    def spawn_words(self, word_objs):
+        self.word_objects.clear()
+        self.word_index.clear()
+        for word in word_objs:
+            self.word_objects.add(word)
+            self.word_index.add(word)
+
+    # Spawns the wave for the current level. Waves only spawn on a clear
+    # screen, so they are laid out without regard to other words.
+    def spawn_wave(self):
+        self.prefetch_waves()
+        # Part of each wave practises the player's weakest bigrams
+        self.spawn_words(self.waves.take(self.level, self.choices,
+                                         self.tracker.weak_bigrams))
+        for _ in self.word_objects:  # Track all newly spawned words
+            self.tracker.add_shown_word()
+        self.new_level = False
+        self.prefetch_waves()
+
+    # Keeps the waves after the current one generating, for the current
+    # word lengths (at least one length is always on)
+    def prefetch_waves(self):
+        if True not in self.choices:
+            self.choices[0] = True
+        level = self.level if self.new_level else self.level + 1
+        self.waves.prefetch(level, self.choices, self.tracker.weak_bigrams)
+
+    # Advances the words by steps fixed steps; expired words cost a life
+    def step(self, steps=1):
+        self.expire(self.word_objects.step(steps))
+
+    def expire(self, words):
+        for word in words:
+            self.tracker.add_missed_word()  # Track expired words
+            self.word_index.remove(word)
+            self.lives -= 1
+
+    # Runs as many fixed simulation steps as frame_ms (plus carried-over
+    # time) covers, so word speed does not depend on the frame rate
+    def simulate(self, frame_ms):
+        self.sim_time += frame_ms
+        steps = 0
+        while self.sim_time >= SIM_STEP_MS:
+            if steps == MAX_STEPS_PER_FRAME:
+                self.sim_time = 0
+                break
+            self.sim_time -= SIM_STEP_MS
+            steps += 1
+        if steps:
+            self.step(steps)  # All steps in one vectorized move
+
+    # Rules part of a frame, before input: spawns the next wave or moves
+    # the words, then checks for a level-up. Returns True if it spawned.
+    def update(self, frame_ms):
+        self.time_ms += frame_ms
+        self.prefetch_waves()
+        if self.pause:
+            return False
+        spawned = self.new_level
+        if spawned:
+            self.spawn_wave()
+        else:
+            self.simulate(frame_ms)
+        self.check_level()
+        return spawned
+
+    # Moves on to the next level once the screen is clear
+    def check_level(self):
+        if len(self.word_objects) <= 0:
+            self.level += 1
+            self.new_level = True
+
+    # Applies one key press (a pygame key code and its character)
+    def key_down(self, key, char=''):
+        # Track all keystrokes
+        if key == pygame.K_BACKSPACE:
+            self.tracker.add_keystroke(is_backspace=True)
+            self.tracker.log_key(key, backspace=True)
+            self.active_string = self.active_string[:-1]
+            return
+
+        if char.isalpha():
+            # Check if keystroke matches any active word
+            target = self.word_index.first_match(self.active_string + char)
+            is_correct = target is not None
+            self.tracker.add_keystroke(correct=is_correct)
+            self.tracker.log_key(ord(char), is_correct,
+                                 word_id=target.id if is_correct else -1)
+            if self.active_string:
+                self.tracker.add_bigram(self.active_string[-1], char,
+                                        is_correct)
+            self.active_string += char
+
+        else:
+            self.tracker.add_keystroke()  # Counts for KPM only
+
+        if key in [pygame.K_RETURN, pygame.K_SPACE]:
+            self.tracker.log_key(key)
+            self.submit = self.active_string
+            self.active_string = ''
+
+    def game_over(self):
+        return self.lives <= 0
+
+    # Starts a new game from level 1
+    def restart(self):
+        self.tracker.reset()
+        self.level = 1
+        self.lives = self.start_lives
+        self.spawn_words([])
+        self.new_level = True
+        self.score = 0
@@ -0,0 +1,267 @@
+import csv
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from session_summary import MetricSummary
+
+STORE_PATH = 'statistics.db'
+LEGACY_CSV_PATH = 'statistics.csv'
+
+# Metric columns saved per session, in the legacy CSV order
+COLUMNS = [
+    ('Net_WPM', 'REAL'),
+    ('Gross_WPM', 'REAL'),
+    ('KPM', 'REAL'),
+    ('Word_Accuracy', 'REAL'),
+    ('Char_Accuracy', 'REAL'),
+    ('Error_Rate', 'REAL'),
+    ('Score', 'INTEGER'),
+    ('Total_Words_Typed', 'INTEGER'),
+    ('Correct_Words', 'INTEGER'),
+    ('Incorrect_Words', 'INTEGER'),
+    ('Characters_Typed', 'INTEGER'),
+    ('Correct_Keystrokes', 'INTEGER'),
+    ('Backspace_Count', 'INTEGER'),
+    ('Longest_Streak', 'INTEGER'),
+    ('Average_Word_Length', 'REAL'),
+    ('Average_Word_Time', 'REAL'),
+    ('Total_Time_Played', 'REAL'),
+    ('Words_Shown', 'INTEGER'),
+    ('Words_Missed', 'INTEGER'),
+]
+# Added later: NULL for sessions saved before them (and when unmeasured)
+LATENCY_COLUMNS = [
+    ('Latency_P50', 'REAL'),  # Key press to frame on screen, ms
+    ('Latency_P95', 'REAL'),
+    ('Latency_P99', 'REAL'),
+]
+METRICS = [name for name, _ in COLUMNS + LATENCY_COLUMNS]
+
+
+# SQLite-backed history of played sessions. Sessions can be read by id
+# range, and a summary table of running per-metric aggregates
+# (MetricSummary), kept up to date by SessionWriter, makes the best score
+# and the statistics overview cost the same however many sessions were
+# played.
+class SessionStore:
+    def __init__(self, path=STORE_PATH, legacy_csv=LEGACY_CSV_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # WAL: appends are atomic and readers never block the writer
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.create_schema()
+        self.migrate_csv(legacy_csv)
+
+    def create_schema(self):
+        columns = ', '.join([f'{name} {kind} NOT NULL'
+                             for name, kind in COLUMNS]
+                            + [f'{name} {kind}'
+                               for name, kind in LATENCY_COLUMNS])
+        with self.conn:
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS sessions ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                f'played_at REAL NOT NULL, {columns})')
+            existing = {row[1] for row in self.conn.execute(
+                'PRAGMA table_info(sessions)')}
+            for name, kind in LATENCY_COLUMNS:
+                if name not in existing:  # Database from an older version
+                    self.conn.execute(
+                        f'ALTER TABLE sessions ADD COLUMN {name} {kind}')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS sessions_score '
+                              'ON sessions (Score)')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS meta ('
+                              'key TEXT PRIMARY KEY, value TEXT)')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS summary ('
+                'metric TEXT PRIMARY KEY, count INTEGER, total REAL, '
+                'lo REAL, hi REAL, rolling TEXT, buckets TEXT)')
+            # The summary covers sessions up to meta summary_id. Editing or
+            # deleting saved sessions (by any program) drops that mark, so
+            # the summary is rebuilt on its next update.
+            for event in ('UPDATE', 'DELETE'):
+                self.conn.execute(
+                    f'CREATE TRIGGER IF NOT EXISTS sessions_{event.lower()} '
+                    f'AFTER {event} ON sessions BEGIN '
+                    "DELETE FROM meta WHERE key = 'summary_id'; END")
+
+    # Imports the rows of the old append-only statistics.csv, once
+    def migrate_csv(self, csv_path):
+        if (not csv_path or not os.path.exists(csv_path)
+                or self.get_meta('csv_migrated')):
+            return
+        rows = []
+        with open(csv_path, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            names = [name for name, _ in COLUMNS]
+            if header != names:  # Headerless rows are in COLUMNS order
+                reader = [header] + list(reader) if header else []
+            for values in reader:
+                if len(values) != len(COLUMNS):
+                    continue
+                rows.append({name: int(float(value)) if kind == 'INTEGER'
+                             else float(value)
+                             for (name, kind), value in zip(COLUMNS, values)})
+        with self.conn:
+            self.insert(rows, played_at=0)
+            self.set_meta('csv_migrated', csv_path)
+
+    def get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?',
+                                (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                          (key, value))
+
+    def insert(self, rows, played_at=None):
+        placeholders = ', '.join('?' * (len(METRICS) + 1))
+        played_at = time.time() if played_at is None else played_at
+        self.conn.executemany(
+            f'INSERT INTO sessions (played_at, {", ".join(METRICS)}) '
+            f'VALUES ({placeholders})',
+            [(played_at, *(row.get(name) for name in METRICS))
+             for row in rows])
+
+    # The stored summary with the sessions saved since its last update
+    # folded in (all sessions when it was invalidated), and the id of the
+    # newest session it covers
+    def fold_summary(self):
+        covered = self.get_meta('summary_id')
+        summaries = self.read_summary() if covered is not None else {}
+        if summaries.keys() != set(METRICS):  # Invalidated or new metrics
+            summaries = {name: MetricSummary() for name in METRICS}
+            covered = 0
+        last_id = self.last_id()
+        for row in self.sessions(first=int(covered) + 1, stop=last_id + 1):
+            for name, value in zip(METRICS, row):
+                summaries[name].add(value)
+        return summaries, last_id
+
+    # Stores the up-to-date summary; only SessionWriter calls this, inside
+    # its write transaction
+    def update_summary(self):
+        summaries, last_id = self.fold_summary()
+        self.conn.execute('DELETE FROM summary')
+        self.conn.executemany(
+            'INSERT INTO summary VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(name, *summary.to_row()) for name, summary in summaries.items()])
+        self.set_meta('summary_id', str(last_id))
+        return summaries
+
+    def read_summary(self):
+        return {row[0]: MetricSummary.from_row(row[1:])
+                for row in self.conn.execute('SELECT * FROM summary')}
+
+    # {metric: MetricSummary} over every saved session. Only reads: any
+    # sessions the stored summary does not cover yet are folded in memory,
+    # from one consistent snapshot of the database.
+    def summary(self):
+        snapshot = not self.conn.in_transaction
+        if snapshot:
+            self.conn.execute('BEGIN')
+        try:
+            return self.fold_summary()[0]
+        finally:
+            if snapshot:
+                self.conn.commit()
+
+    # Saves one session, given as a dict of METRICS values
+    def add(self, row):
+        with self.conn:
+            self.insert([row])
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    # Id of the newest session (0 when empty)
+    def last_id(self):
+        row = self.conn.execute('SELECT MAX(id) FROM sessions').fetchone()
+        return row[0] or 0
+
+    # Changes whenever another connection commits to the database
+    def data_version(self):
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    # Highest score ever saved (0 when empty), from the summary
+    def best_score(self):
+        best = self.summary()['Score'].hi
+        return int(best) if best is not None else 0
+
+    # Metric rows for sessions with first <= id < stop, oldest first
+    def sessions(self, first=1, stop=None, metrics=METRICS):
+        query = (f'SELECT {", ".join(metrics)} FROM sessions '
+                 'WHERE id >= ?')
+        params = [first]
+        if stop is not None:
+            query += ' AND id < ?'
+            params.append(stop)
+        return self.conn.execute(query + ' ORDER BY id', params).fetchall()
+
+    # The same rows as a pandas DataFrame with one column per metric
+    def to_dataframe(self, first=1, stop=None, metrics=METRICS):
+        import pandas as pd
+        return pd.DataFrame(self.sessions(first, stop, metrics),
+                            columns=list(metrics))
+
+    def close(self):
+        self.conn.close()
+
+
+# Saves sessions from a worker thread so disk latency never reaches the
+# game loop. Rows queued while a write is in progress are batched into one
+# transaction. fsync: 'off' (leave it to the OS), 'normal' (WAL default,
+# safe against application crashes) or 'full' (fsync every commit).
+class SessionWriter:
+    def __init__(self, path=STORE_PATH, fsync='normal', batch_size=64):
+        if fsync not in ('off', 'normal', 'full'):
+            raise ValueError(f'unknown fsync policy: {fsync}')
+        self.path = path
+        self.fsync = fsync
+        self.batch_size = batch_size
+        self.pending = queue.SimpleQueue()
+        self.worker = threading.Thread(target=self.write_rows,
+                                       name='session-writer', daemon=True)
+        self.worker.start()
+
+    # Queues one session (a dict of METRICS values); never blocks
+    def add(self, row):
+        self.pending.put(row)
+
+    def write_rows(self):
+        store = SessionStore(self.path, legacy_csv=None)
+        store.conn.execute(f'PRAGMA synchronous={self.fsync.upper()}')
+        if store.get_meta('summary_id') != str(store.last_id()):
+            with store.conn:  # Stale summary (e.g. after a CSV migration)
+                store.update_summary()
+        done = False
+        while not done:
+            rows = [self.pending.get()]
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            if rows[-1] is None:  # close() was called
+                rows.pop()
+                done = True
+            if not rows:
+                continue
+            try:
+                with store.conn:
+                    store.insert(rows)
+                    store.update_summary()
+            except sqlite3.Error as e:
+                print(f'Could not save {len(rows)} session(s): {e}',
+                      file=sys.stderr)
+        store.close()
+
+    # Writes every queued session, then stops the worker
+    def close(self):
+        self.pending.put(None)
+        self.worker.join()
@@ -0,0 +1,92 @@
+import json
+import math
+
+RELATIVE_ACCURACY = 0.01  # Percentiles are within 1% of a true value
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+ROLLING_SPANS = (10, 100)  # Sessions covered by the rolling averages
+ZERO = 1e-9  # Magnitudes below this count as zero
+
+
+# Running summary of one metric over every saved session: count, sum,
+# min/max, exponentially weighted rolling averages and a log-bucketed
+# histogram (a DDSketch) for percentiles. Its size does not depend on how
+# many sessions it covers, and sessions are added one at a time.
+class MetricSummary:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.lo = None
+        self.hi = None
+        self.rolling = [None] * len(ROLLING_SPANS)
+        # (sign, bucket) -> count; bucket i holds magnitudes in
+        # (GAMMA ** (i - 1), GAMMA ** i], sign 0 holds zeros
+        self.buckets = {}
+
+    # Adds one session's value; None (not measured) is skipped
+    def add(self, value):
+        if value is None:
+            return
+        value = float(value)
+        self.count += 1
+        self.total += value
+        self.lo = value if self.lo is None else min(self.lo, value)
+        self.hi = value if self.hi is None else max(self.hi, value)
+        for i, span in enumerate(ROLLING_SPANS):
+            last = self.rolling[i]
+            self.rolling[i] = (value if last is None
+                               else last + (value - last) * 2 / (span + 1))
+        key = bucket_key(value)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    # Value below which p percent of the sessions fall (within
+    # RELATIVE_ACCURACY), or None without sessions
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = max(1, -(-self.count * p // 100))  # ceil(count * p / 100)
+        seen = 0
+        for key in sorted(self.buckets, key=bucket_order):
+            seen += self.buckets[key]
+            if seen >= rank:
+                return min(max(bucket_value(key), self.lo), self.hi)
+
+    # Columns of the store's summary table, after the metric name
+    def to_row(self):
+        return (self.count, self.total, self.lo, self.hi,
+                json.dumps(self.rolling),
+                json.dumps([[sign, i, n]
+                            for (sign, i), n in self.buckets.items()]))
+
+    @classmethod
+    def from_row(cls, row):
+        summary = cls()
+        (summary.count, summary.total, summary.lo, summary.hi,
+         rolling, buckets) = row
+        summary.rolling = json.loads(rolling)
+        summary.buckets = {(sign, i): n for sign, i, n in json.loads(buckets)}
+        return summary
+
+
+def bucket_key(value):
+    if abs(value) < ZERO:
+        return 0, 0
+    return (1 if value > 0 else -1), math.ceil(math.log(abs(value))
+                                               / LOG_GAMMA)
+
+
+# Sort key putting buckets in order of their values
+def bucket_order(key):
+    sign, i = key
+    return sign, sign * i
+
+
+# The value a bucket stands for: the point with the same relative error
+# to both of its bounds
+def bucket_value(key):
+    sign, i = key
+    return sign * 2 * GAMMA ** i / (GAMMA + 1)
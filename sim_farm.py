@@ -0,0 +1,199 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pygame
+from app import Dataset
+from session import GameSession, SIM_STEP_MS
+
+# Per-session results collected by the farm; all but level and capped are
+# Tracker.session_row metrics
+RESULTS = ('Score', 'Level', 'Net_WPM', 'Char_Accuracy', 'Words_Missed',
+           'Backspace_Count', 'Total_Time_Played', 'Capped')
+PERCENTILES = (5, 25, 50, 75, 95)
+MAX_SESSION_S = 1800  # Sessions still alive after this are cut off
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+# A simulated player. wpm is the typing speed (5 keystrokes per word, as
+# in Tracker's WPM), error_rate the chance a letter is mistyped and
+# fix_rate the chance a mistake is noticed and backspaced; otherwise the
+# word is finished and submitted wrong. reaction_ms is spent picking each
+# new target word.
+class BotTypist:
+    def __init__(self, wpm=60, error_rate=0.05, fix_rate=0.8,
+                 reaction_ms=250, seed=None):
+        self.wpm = wpm
+        self.error_rate = error_rate
+        self.fix_rate = fix_rate
+        self.reaction_ms = reaction_ms
+        self.rng = random.Random(seed)
+        self.key_ms = 60000 / (wpm * 5)  # Mean time between keystrokes
+        self.target = None
+        self.fixing = False
+
+    # Delay before the next keystroke (gamma distributed around key_ms)
+    def delay_ms(self):
+        return self.rng.gammavariate(4, self.key_ms / 4)
+
+    # The word closest to the left edge, which expires first
+    @staticmethod
+    def most_urgent(session):
+        store = session.word_objects
+        slots = np.flatnonzero(store.alive)
+        if not len(slots):
+            return None
+        return store.enemies[slots[np.argmin(store.x[slots])]]
+
+    # Returns (key, char, extra delay in ms) for the next keystroke
+    def next_key(self, session):
+        typed = session.active_string
+        if self.target is None or self.target.slot is None:
+            if typed:  # Target expired mid-word: give up on it
+                return pygame.K_SPACE, ' ', 0
+            self.target = self.most_urgent(session)
+            self.fixing = False
+            if self.target is None:
+                return None, '', 0
+            return self.next_key(session)[:2] + (self.reaction_ms,)
+        text = self.target.text
+        if not text.startswith(typed):  # A mistake is in the input
+            if self.fixing:
+                return pygame.K_BACKSPACE, '', 0
+            if len(typed) >= len(text):
+                self.target = None
+                return pygame.K_SPACE, ' ', 0
+        elif typed == text:
+            self.target = None
+            return pygame.K_SPACE, ' ', 0
+        char = text[len(typed)]
+        if self.rng.random() < self.error_rate:
+            char = self.rng.choice(LETTERS.replace(char.lower(), ''))
+            self.fixing = self.rng.random() < self.fix_rate
+        return ord(char.lower()), char, 0
+
+
+# Plays one full game with bot on a simulated clock and returns its
+# results. Time jumps straight from one event (keystroke, word expiry,
+# new wave) to the next instead of running every frame.
+def play_session(dataset, bot, seed, lives=GameSession.START_LIVES,
+                 max_session_s=MAX_SESSION_S):
+    dataset.reseed(seed)
+    session = GameSession(dataset, lives=lives)
+    step = 0
+    next_key_ms = 0.0
+    max_steps = int(max_session_s * 1000 / SIM_STEP_MS)
+    while not session.game_over() and step < max_steps:
+        if session.new_level:
+            session.spawn_wave()
+            bot.target = None
+        key_step = max(int(next_key_ms / SIM_STEP_MS), step)
+        expiry = session.word_objects.steps_to_expiry()
+        target = key_step if expiry is None else min(key_step,
+                                                     step + expiry)
+        if target > step:
+            session.step(target - step)
+            step = target
+            session.time_ms = step * SIM_STEP_MS
+        if step == key_step:
+            key, char, wait = bot.next_key(session)
+            if key is not None:
+                session.key_down(key, char)
+                if session.submit:
+                    session.check_answer()
+                    session.submit = ''
+            next_key_ms = session.time_ms + wait + bot.delay_ms()
+        session.check_level()
+    row = session.tracker.session_row(session.score)
+    row['Level'] = session.level
+    row['Capped'] = int(not session.game_over())
+    return [row[name] for name in RESULTS]
+
+
+_dataset = None  # Per-worker Dataset, loaded once by init_worker
+
+
+def init_worker(corpus=None, speeds=None):
+    global _dataset
+    _dataset = Dataset(corpus=corpus)
+    if speeds is not None:
+        _dataset.speeds = speeds
+
+
+# Plays sessions for seeds [first, stop) with one bot configuration
+def play_batch(bot_args, first, stop, lives):
+    results = np.empty((stop - first, len(RESULTS)))
+    for i, seed in enumerate(range(first, stop)):
+        bot = BotTypist(seed=seed, **bot_args)
+        results[i] = play_session(_dataset, bot, seed, lives)
+    return results
+
+
+# Runs sessions games for each bot configuration across worker processes
+# and returns {config index: results array}, one row per session
+def run_farm(bots, sessions, lives=GameSession.START_LIVES, speeds=None,
+             corpus=None, workers=None, batch=200):
+    results = {i: [] for i in range(len(bots))}
+    with ProcessPoolExecutor(workers or os.cpu_count(),
+                             initializer=init_worker,
+                             initargs=(corpus, speeds)) as pool:
+        futures = {}
+        for i, bot_args in enumerate(bots):
+            for first in range(0, sessions, batch):
+                stop = min(first + batch, sessions)
+                future = pool.submit(play_batch, bot_args, first, stop, lives)
+                futures[future] = i
+        for future, i in futures.items():
+            results[i].append(future.result())
+    return {i: np.concatenate(parts) for i, parts in results.items()}
+
+
+# {result name: (mean, percentile values)} for one configuration
+def summarize(results):
+    return {name: (results[:, j].mean(),
+                   np.percentile(results[:, j], PERCENTILES))
+            for j, name in enumerate(RESULTS)}
+
+
+def print_summary(bot_args, results):
+    print(', '.join(f'{key}={value}' for key, value in bot_args.items())
+          + f'  ({len(results)} sessions)')
+    print(f'  {"":24}{"mean":>9}'
+          + ''.join(f'{"p" + str(p):>9}' for p in PERCENTILES))
+    for name, (mean, values) in summarize(results).items():
+        print(f'  {name:24}{mean:9.2f}'
+              + ''.join(f'{value:9.2f}' for value in values))
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Play many bot games without rendering and print '
+                    'percentile summaries per bot configuration.')
+    parser.add_argument('--sessions', type=int, default=1000,
+                        help='games per bot configuration')
+    parser.add_argument('--wpm', default='40,60,80',
+                        help='comma-separated bot typing speeds')
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--fix-rate', type=float, default=0.8)
+    parser.add_argument('--reaction-ms', type=float, default=250)
+    parser.add_argument('--lives', type=int, default=GameSession.START_LIVES)
+    parser.add_argument('--speeds', default='3-5',
+                        help='slowest-fastest word speed (px per step)')
+    parser.add_argument('--corpus', default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    bots = [dict(wpm=float(wpm), error_rate=args.error_rate,
+                 fix_rate=args.fix_rate, reaction_ms=args.reaction_ms)
+            for wpm in args.wpm.split(',')]
+    slow, fast = (int(speed) for speed in args.speeds.split('-'))
+    start = time.perf_counter()
+    all_results = run_farm(bots, args.sessions, args.lives, (slow, fast),
+                           args.corpus, args.workers)
+    elapsed = time.perf_counter() - start
+    for i, bot_args in enumerate(bots):
+        print_summary(bot_args, all_results[i])
+    total = args.sessions * len(bots)
+    print(f'{total} sessions in {elapsed:.1f} s '
+          f'({total / elapsed:.0f} sessions/s)')
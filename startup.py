@@ -0,0 +1,112 @@
+import os
+import time
+
+# Startup timeline of the game process. main.py imports this module
+# first, so START is close to interpreter start-up; Game records marks
+# as it initializes and when its first frame is on screen.
+START_WALL = time.time()
+START = time.perf_counter()
+marks = {}  # Label -> seconds since START, in the order first reached
+
+BUDGET_MS = 1500  # Default time-to-first-frame budget, launch included
+
+
+# Records label the first time it is reached
+def mark(label):
+    if label not in marks:
+        marks[label] = time.perf_counter() - START
+
+
+# (label, ms since launch, ms since the previous mark) rows; launched is
+# the wall-clock launch time when known (otherwise this module's import)
+def report(launched=None):
+    offset = (START_WALL - launched) * 1000 if launched else 0
+    rows = [('interpreter', offset, offset)] if launched else []
+    last = offset
+    for label, seconds in marks.items():
+        ms = offset + seconds * 1000
+        rows.append((label, ms, ms - last))
+        last = ms
+    return rows
+
+
+# Child process body for check_budget: starts the game headless, shows
+# one frame, quits and prints the report
+def first_frame(launched):
+    import main
+    from headless import ScriptedInput
+    mark('imports')
+    main.Game(headless=True, events=ScriptedInput(max_ticks=1),
+              save_stats=False).run()
+    for label, ms, delta in report(launched):
+        print(f'{label} {ms:.1f} {delta:.1f}')
+
+
+# Cold-starts the game runs times in fresh processes and returns the
+# reports, each a list of (label, ms since launch, delta) rows. The game
+# runs in a scratch directory holding a copy of the word index, so
+# measuring leaves no files behind in the working tree.
+def measure(runs=3):
+    import shutil
+    import tempfile
+    from vocab_index import VOCAB_INDEX_PATH
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, (here, os.environ.get('PYTHONPATH')))))
+    reports = []
+    with tempfile.TemporaryDirectory() as workdir:
+        index = os.path.join(here, VOCAB_INDEX_PATH)
+        if os.path.exists(index):
+            shutil.copy2(index, workdir)
+        for _ in range(runs):
+            reports.append(first_frame_report(workdir, env))
+    return reports
+
+
+# Runs first_frame in a fresh process and parses its report
+def first_frame_report(workdir, env):
+    import subprocess
+    import sys
+    launched = time.time()
+    out = subprocess.run(
+        [sys.executable, '-c',
+         f'import startup; startup.first_frame({launched!r})'],
+        cwd=workdir, env=env, capture_output=True, text=True,
+        check=True).stdout
+    rows = []
+    for line in out.splitlines():
+        parts = line.split()
+        if len(parts) == 3:
+            try:
+                rows.append((parts[0], float(parts[1]), float(parts[2])))
+            except ValueError:
+                pass  # Not a report line (e.g. pygame's banner)
+    return rows
+
+
+# Median time to first frame in ms over the reports of measure()
+def median_first_frame(reports):
+    first = sorted(dict((label, ms) for label, ms, _ in rows)['first_frame']
+                   for rows in reports)
+    return first[len(first) // 2]
+
+
+if __name__ == '__main__':
+    # python startup.py [budget_ms] [runs] prints the startup timeline and
+    # exits with status 1 when the median time to first frame is over
+    # budget_ms
+    import sys
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_MS
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    reports = measure(runs)
+    print(f'{"phase":<14}' + ''.join(f'{"run " + str(i + 1):>18}'
+                                     for i in range(runs)))
+    for i, (label, _, _) in enumerate(reports[0]):
+        print(f'{label:<14}' + ''.join(
+            f'{rows[i][1]:9.1f}{"+" + format(rows[i][2], ".1f"):>9}'
+            for rows in reports))
+    median = median_first_frame(reports)
+    status = 'OK' if median <= budget else 'OVER BUDGET'
+    print(f'time to first frame: median {median:.1f} ms, '
+          f'budget {budget:.0f} ms: {status}')
+    sys.exit(0 if median <= budget else 1)
@@ -1,9 +1,48 @@
 import tkinter as tk
 from tkinter import ttk
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from Tracker import Tracker
+from session_store import METRICS
+
+MAX_POINTS = 2000  # Points drawn per series after downsampling
+MAX_BARS = 200  # Bars drawn per series after bucketing
+REFRESH_MS = 1000  # How often the store is polled for new sessions
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling of a line to n_out
+    points, keeping the first and last points and the visual extremes"""
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return x, y
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle corner
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < n_out - 1 else n
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[prev] - avg_x) * (y[lo:hi] - y[prev])
+                      - (x[prev] - x[lo:hi]) * (avg_y - y[prev]))
+        prev = lo + int(area.argmax())
+        keep[i + 1] = prev
+    return x[keep], y[keep]
+
+
+def bucket_means(y, n_out):
+    """Averages y over n_out equal buckets; returns bucket centres and means"""
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n), y
+    edges = np.linspace(0, n, n_out + 1).astype(np.int64)
+    sums = np.add.reduceat(y, edges[:-1])
+    return (edges[:-1] + edges[1:] - 1) / 2, sums / np.diff(edges)
 
 
 class StatPage:
@@ -12,15 +51,21 @@ class StatPage:
         self.root.title("Typing Statistics Visualization")
         self.root.geometry("1200x800")
 
-        # Load data
-        self.df = pd.DataFrame(Tracker.read_csv("statistics.csv"))
-
-        # Convert numeric columns
-        for col in self.df.columns:
-            self.df[col] = pd.to_numeric(self.df[col])
+        # Load data: the per-metric summary now, the sessions themselves
+        # only once a chart needs them
+        self.store = Tracker.open_store()
+        self.last_id = self.store.last_id()
+        self.data_version = self.store.data_version()
+        self.summary = self.store.summary()
+        self.sessions = None  # DataFrame of every session, loaded lazily
+        self.series = {}  # metric -> values as a float array
+        self.reduced = {}  # (kind, metrics) -> downsampled arrays
+        self.plot_key = None  # Options the current plot was drawn with
+        self.lines = []  # Line Chart artists, updated in place
+        self.scatter = None  # Scatter Plot artist, updated in place
 
         # Variables
-        self.metric_var = tk.StringVar(value=self.df.columns[0])
+        self.metric_var = tk.StringVar(value=METRICS[0])
         self.graph_type_var = tk.StringVar(value="Line Chart")
         self.second_metric_var = tk.StringVar(value="None")
 
@@ -28,10 +73,32 @@ class StatPage:
         self.create_controls()
         self.create_plot_frame()
 
-        # Initial plot
-        self.update_plot()
+        # Initial plot, once the window is up
+        self.root.after(0, self.update_plot)
 
+        self.root.after(REFRESH_MS, self.refresh)
         self.root.mainloop()
+        self.store.close()
+
+    def refresh(self):
+        """Append sessions saved since the last poll and redraw"""
+        version = self.store.data_version()
+        if version != self.data_version:
+            self.data_version = version
+            last_id = self.store.last_id()
+            if last_id > self.last_id:
+                if self.sessions is not None:
+                    new_rows = self.store.to_dataframe(
+                        first=self.last_id + 1, stop=last_id + 1)
+                    self.sessions = pd.concat([self.sessions, new_rows],
+                                              ignore_index=True)
+                self.last_id = last_id
+                self.summary = self.store.summary()
+                self.series.clear()
+                self.reduced.clear()
+                self.plot_key = None
+                self.update_plot()
+        self.root.after(REFRESH_MS, self.refresh)
 
     def create_controls(self):
         """Create control panel with dropdowns and buttons"""
@@ -44,7 +111,7 @@ class StatPage:
         metric_dropdown = ttk.Combobox(
             control_frame,
             textvariable=self.metric_var,
-            values=list(self.df.columns),
+            values=METRICS,
             state="readonly",
             width=20
         )
@@ -56,7 +123,7 @@ class StatPage:
         second_metric_dropdown = ttk.Combobox(
             control_frame,
             textvariable=self.second_metric_var,
-            values=["None"] + list(self.df.columns),
+            values=["None"] + METRICS,
             state="readonly",
             width=20
         )
@@ -93,73 +160,196 @@ class StatPage:
         )
         quit_btn.grid(row=0, column=7, padx=5)
 
+        # Summary of the primary metric over all sessions
+        self.summary_label = tk.Label(control_frame, anchor="w")
+        self.summary_label.grid(row=1, column=0, columnspan=8, sticky="w",
+                                padx=5, pady=(8, 0))
+
     def create_plot_frame(self):
-        """Create frame for matplotlib plots"""
+        """Create frame with the one figure and canvas reused by every plot"""
         self.plot_frame = tk.Frame(self.root)
         self.plot_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        self.canvas = None
+        self.fig = Figure(figsize=(10, 6))
+        self.ax = self.fig.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
-    def update_plot(self):
-        """Generate the selected plot type"""
-        # Clear previous plot
-        if self.canvas:
-            self.canvas.get_tk_widget().destroy()
+    @property
+    def df(self):
+        """Every session's metrics, read from the store on first use"""
+        if self.sessions is None:
+            self.sessions = self.store.to_dataframe(stop=self.last_id + 1)
+        return self.sessions
+
+    def column(self, metric):
+        """Cached float array of a metric (NaN where a session has none)"""
+        if metric not in self.series:
+            self.series[metric] = self.df[metric].to_numpy(dtype=float)
+        return self.series[metric]
+
+    def values(self, metric):
+        """A metric's values, skipping sessions without one (e.g. latency
+        from before it was measured)"""
+        y = self.column(metric)
+        return y[~np.isnan(y)]
+
+    def line_points(self, metric):
+        """Cached LTTB-downsampled (session, value) points of a metric"""
+        key = ("line", metric)
+        if key not in self.reduced:
+            y = self.values(metric)
+            self.reduced[key] = lttb(np.arange(len(y), dtype=float), y,
+                                     MAX_POINTS)
+        return self.reduced[key]
+
+    def bar_points(self, metric):
+        """Cached per-bucket means of a metric"""
+        key = ("bar", metric)
+        if key not in self.reduced:
+            self.reduced[key] = bucket_means(self.values(metric), MAX_BARS)
+        return self.reduced[key]
+
+    def scatter_points(self, metric, second_metric):
+        """Cached evenly strided sample of (x, y) points"""
+        key = ("scatter", metric, second_metric)
+        if key not in self.reduced:
+            y = self.column(metric)
+            if second_metric != "None":
+                x = self.column(second_metric)
+                known = ~(np.isnan(y) | np.isnan(x))
+                y, x = y[known], x[known]
+                stride = max(1, len(y) // MAX_POINTS)
+                self.reduced[key] = (y[::stride], x[::stride])
+            else:
+                y = self.values(metric)
+                stride = max(1, len(y) // MAX_POINTS)
+                self.reduced[key] = (np.arange(0, len(y), stride), y[::stride])
+        return self.reduced[key]
+
+    def box_stats(self, metric):
+        """Box plot statistics from the metric's summary (approximate
+        quartiles, whiskers at 1.5 IQR within the range, no fliers)"""
+        summary = self.summary[metric]
+        if not summary.count:
+            return {"label": metric, "med": np.nan, "q1": np.nan,
+                    "q3": np.nan, "whislo": np.nan, "whishi": np.nan,
+                    "fliers": []}
+        q1, med, q3 = (summary.percentile(p) for p in (25, 50, 75))
+        iqr = q3 - q1
+        return {"label": metric, "mean": summary.mean, "med": med,
+                "q1": q1, "q3": q3, "iqr": iqr,
+                "whislo": max(summary.lo, q1 - 1.5 * iqr),
+                "whishi": min(summary.hi, q3 + 1.5 * iqr), "fliers": []}
 
+    def summary_text(self, metric):
+        """One line of the metric's count, range, percentiles and rolling
+        averages"""
+        summary = self.summary[metric]
+        if not summary.count:
+            return f"{metric}: no sessions yet"
+        last_10, last_100 = summary.rolling
+        return (f"{metric} over {summary.count} sessions:  "
+                f"mean {summary.mean:.2f}   min {summary.lo:.2f}   "
+                f"max {summary.hi:.2f}   p50 {summary.percentile(50):.2f}   "
+                f"p95 {summary.percentile(95):.2f}   "
+                f"recent average {last_10:.2f} (~10 sessions), "
+                f"{last_100:.2f} (~100)")
+
+    def update_plot(self):
+        """Generate the selected plot type on the reused axes"""
         # Get selected options
         metric = self.metric_var.get()
         graph_type = self.graph_type_var.get()
         second_metric = self.second_metric_var.get()
+        key = (graph_type, metric, second_metric)
+        if key == self.plot_key:
+            return
+        self.summary_label.config(text=self.summary_text(metric))
+        ax = self.ax
+        previous, self.plot_key = self.plot_key, key
+
+        # Line and scatter plots with the same layout only swap their data
+        same_layout = (previous is not None and previous[0] == graph_type
+                       and (previous[2] == "None") == (second_metric == "None"))
+        if graph_type == "Line Chart" and same_layout:
+            self.lines[0].set_data(*self.line_points(metric))
+            if second_metric != "None":
+                self.lines[1].set_data(*self.line_points(second_metric))
+                ax.legend([metric, second_metric])
+            ax.set_title(f"{metric} Over Sessions")
+            ax.set_ylabel(metric)
+            ax.relim()
+            ax.autoscale_view()
+            self.canvas.draw_idle()
+            return
+        if graph_type == "Scatter Plot" and same_layout:
+            self.scatter.set_offsets(np.column_stack(
+                self.scatter_points(metric, second_metric)))
+            if second_metric != "None":
+                ax.set_title(f"{metric} vs {second_metric}")
+            else:
+                ax.set_title(f"{metric} Distribution")
+            ax.set_ylabel(metric)
+            # relim() skips collections, so reset the data limits directly
+            ax.ignore_existing_data_limits = True
+            ax.update_datalim(self.scatter.get_offsets())
+            ax.autoscale_view()
+            self.canvas.draw_idle()
+            return
 
-        # Create figure
-        fig, ax = plt.subplots(figsize=(10, 6))
+        ax.clear()
+        self.lines = []
+        self.scatter = None
 
         # Generate different plot types
         if graph_type == "Line Chart":
-            ax.plot(self.df[metric], marker='o', linestyle='-', color='blue')
+            self.lines = ax.plot(*self.line_points(metric), marker='o',
+                                 linestyle='-', color='blue')
             if second_metric != "None":
-                ax.plot(self.df[second_metric], marker='s', linestyle='--',
-                        color='green')
+                self.lines += ax.plot(*self.line_points(second_metric),
+                                      marker='s', linestyle='--',
+                                      color='green')
                 ax.legend([metric, second_metric])
             ax.set_title(f"{metric} Over Sessions")
 
         elif graph_type == "Bar Chart":
-            ax.bar(self.df.index, self.df[metric], color='skyblue')
+            x, heights = self.bar_points(metric)
+            width = x[1] - x[0] if len(x) > 1 else 0.8
+            ax.bar(x, heights, width=width * 0.8, color='skyblue')
             if second_metric != "None":
-                ax.bar(self.df.index, self.df[second_metric],
-                       bottom=self.df[metric], color='lightgreen')
+                ax.bar(x, self.bar_points(second_metric)[1], width=width * 0.8,
+                       bottom=heights, color='lightgreen')
                 ax.legend([metric, second_metric])
             ax.set_title(f"{metric} by Session")
 
         elif graph_type == "Scatter Plot":
+            self.scatter = ax.scatter(
+                *self.scatter_points(metric, second_metric), color='red')
             if second_metric != "None":
-                ax.scatter(self.df[metric], self.df[second_metric],
-                           color='red')
                 ax.set_xlabel(metric)
                 ax.set_ylabel(second_metric)
                 ax.set_title(f"{metric} vs {second_metric}")
             else:
-                ax.scatter(self.df.index, self.df[metric], color='red')
                 ax.set_title(f"{metric} Distribution")
                 ax.set_xlabel("Session")
 
         elif graph_type == "Histogram":
-            ax.hist(self.df[metric], bins=10, color='purple',
+            ax.hist(self.values(metric), bins=10, color='purple',
                     edgecolor='black')
             ax.set_title(f"Distribution of {metric}")
 
         elif graph_type == "Box Plot":
+            stats = [self.box_stats(metric)]
             if second_metric != "None":
-                data = [self.df[metric], self.df[second_metric]]
-                ax.boxplot(data, labels=[metric, second_metric])
-            else:
-                ax.boxplot(self.df[metric])
+                stats.append(self.box_stats(second_metric))
+            ax.bxp(stats)
             ax.set_title(f"Distribution Analysis of {metric}")
 
         elif graph_type == "Pie Chart":
-            latest_data = self.df.tail(10)
+            latest_data = self.df[metric].dropna().tail(10)
             if len(latest_data) > 0:
                 labels = [f"Session {i}" for i in latest_data.index]
-                ax.pie(latest_data[metric], labels=labels, autopct='%1.1f%%')
+                ax.pie(latest_data, labels=labels, autopct='%1.1f%%')
                 ax.set_title(f"{metric} Distribution (Latest 10 Sessions)")
             else:
                 ax.text(0.5, 0.5, "No data available", ha='center',
@@ -171,9 +361,7 @@ class StatPage:
             ax.set_ylabel(metric)
         ax.grid(True)
 
-        self.canvas = FigureCanvasTkAgg(fig, master=self.plot_frame)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.canvas.draw_idle()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,32 @@
+from keystroke_log import KeystrokeLog, read_keystrokes
+
+
+def test_events_round_trip_across_chunks_and_sessions(tmp_path):
+    path = str(tmp_path / 'keystrokes.bin')
+    log = KeystrokeLog(path, chunk_events=4, pool=2)
+    log.start_session(1000.0)
+    for i in range(10):  # Spans three chunks
+        log.log(ord('a') + i, correct=i % 2 == 0, word_id=i)
+    log.start_session(2000.0)
+    log.log(8, backspace=True)
+    log.close()
+
+    events = list(read_keystrokes(path))
+    assert len(events) == 11
+    for i, (start, seconds, key, correct, backspace, word) in \
+            enumerate(events[:10]):
+        assert (start, key, correct, backspace, word) == \
+            (1000.0, ord('a') + i, i % 2 == 0, False, i)
+        assert seconds >= 0
+    assert [event[0] for event in events[10:]] == [2000.0]
+    assert events[10][2:] == (8, False, True, -1)
+
+
+def test_sessions_append_to_an_existing_log(tmp_path):
+    path = str(tmp_path / 'keystrokes.bin')
+    for start in (1.0, 2.0):
+        log = KeystrokeLog(path)
+        log.start_session(start)
+        log.log(ord('x'))
+        log.close()
+    assert [event[0] for event in read_keystrokes(path)] == [1.0, 2.0]
@@ -0,0 +1,38 @@
+import random
+from lane_layout import EXIT_X, GAP, LaneLayout
+
+
+def test_word_goes_at_desired_x_in_an_empty_lane():
+    layout = LaneLayout()
+    assert layout.place('cat', 1.0, 500) == (500, 10)
+    assert layout.place('dog', 1.0, 500, first_lane=3) == (500, 130)
+
+
+def test_faster_word_is_held_back_until_the_slower_one_exits():
+    layout = LaneLayout()
+    layout.n_lanes = 1
+    layout.reset()
+    layout.place('slow', 1.0, 0)  # Width 80, leaves the screen at t=200
+    x, _ = layout.place('fast', 4.0, 0)
+    assert x >= 80 + GAP  # Clear of the slow word now
+    assert x - 4.0 * 200 >= EXIT_X + 80 + GAP  # And when it exits
+
+
+def test_random_waves_never_overlap():
+    rng = random.Random(0)
+    layout = LaneLayout()
+    words = []
+    for _ in range(300):
+        text = 'w' * rng.randint(2, 12)
+        speed = rng.uniform(0.5, 5.0)
+        x, y = layout.place(text, speed, rng.randint(1000, 1200),
+                            rng.randrange(layout.n_lanes))
+        words.append((x, y, layout.measure(text), speed))
+    for i, (x1, y1, w1, s1) in enumerate(words):
+        for x2, y2, w2, s2 in words[i + 1:]:
+            if y1 != y2:
+                continue
+            # Later words go behind: check now and when the one ahead exits
+            ahead_exit = (x1 - EXIT_X) / s1
+            for t in (0, ahead_exit):
+                assert x2 - s2 * t >= x1 - s1 * t + w1
@@ -0,0 +1,58 @@
+import random
+import pytest
+from session_summary import RELATIVE_ACCURACY, ROLLING_SPANS, MetricSummary
+
+
+def summary_of(values):
+    summary = MetricSummary()
+    for value in values:
+        summary.add(value)
+    return summary
+
+
+def test_percentiles_are_within_the_relative_accuracy():
+    rng = random.Random(0)
+    values = [rng.lognormvariate(3, 1) for _ in range(5000)] + [0.0] * 50
+    summary = summary_of(values)
+    ordered = sorted(values)
+    for p in (1, 5, 50, 95, 99, 100):
+        exact = ordered[max(1, -(-len(ordered) * p // 100)) - 1]
+        assert summary.percentile(p) == pytest.approx(
+            exact, rel=RELATIVE_ACCURACY, abs=1e-9)
+    assert summary.percentile(0.5) == 0
+
+
+def test_negative_values_sort_below_positive_ones():
+    summary = summary_of([-10, -1, 1, 10])
+    assert summary.percentile(25) == pytest.approx(-10, rel=RELATIVE_ACCURACY)
+    assert summary.percentile(50) == pytest.approx(-1, rel=RELATIVE_ACCURACY)
+    assert summary.percentile(100) == 10
+
+
+def test_count_mean_and_extremes_are_exact_and_none_is_skipped():
+    summary = summary_of([3, None, 1, 8])
+    assert (summary.count, summary.mean, summary.lo, summary.hi) == \
+        (3, 4, 1, 8)
+    assert MetricSummary().percentile(50) is None
+    assert MetricSummary().mean is None
+
+
+def test_rolling_averages_are_ewmas_over_their_spans():
+    values = [float(i % 7) for i in range(300)]
+    summary = summary_of(values)
+    for span, rolling in zip(ROLLING_SPANS, summary.rolling):
+        alpha = 2 / (span + 1)
+        expected = values[0]
+        for value in values[1:]:
+            expected += alpha * (value - expected)
+        assert rolling == pytest.approx(expected)
+    assert summary_of([5.0]).rolling == [5.0] * len(ROLLING_SPANS)
+
+
+def test_row_round_trip_keeps_adding():
+    values = [1.5, 2.5, 0.0, 40.0]
+    summary = MetricSummary.from_row(summary_of(values).to_row())
+    summary.add(7.0)
+    expected = summary_of(values + [7.0])
+    assert summary.to_row() == expected.to_row()
+    assert summary.percentile(50) == expected.percentile(50)
@@ -0,0 +1,6 @@
+import startup
+
+
+def test_time_to_first_frame_is_within_budget():
+    reports = startup.measure(runs=3)
+    assert startup.median_first_frame(reports) <= startup.BUDGET_MS
@@ -0,0 +1,30 @@
+import pygame
+from app import Enemy
+from session import GameSession
+
+
+def type_text(session, text):
+    for char in text:
+        session.key_down(ord(char.lower()), char)
+
+
+def test_perfectly_typed_word_is_full_accuracy():
+    session = GameSession(dataset=None)
+    session.spawn_words([Enemy('cat', 3, 100, 500)])
+    type_text(session, 'cat')
+    session.key_down(pygame.K_SPACE, ' ')
+    assert session.tracker.live_accuracy() == 100
+    assert session.tracker.accuracy() == 100
+    assert session.tracker.error_rate() == 0
+    assert session.tracker.total_keystrokes == 4  # Space counts for KPM
+
+
+def test_mistyped_letters_lower_accuracy():
+    session = GameSession(dataset=None)
+    session.spawn_words([Enemy('cat', 3, 100, 500)])
+    type_text(session, 'cx')
+    session.key_down(pygame.K_BACKSPACE)
+    type_text(session, 'at')
+    assert session.tracker.live_accuracy() == 75
+    assert session.tracker.accuracy() == 75
+    assert session.tracker.backspace_count == 1
@@ -0,0 +1,50 @@
+import pytest
+from vocab_index import (VocabIndex, build_vocab_index, length_indexes,
+                         sources_stamp)
+
+WORDS = ['dog', 'ab', 'naïve', 'cat', 'a', 'émigré', 'to']
+
+
+def test_index_round_trips_words_in_length_order(tmp_path):
+    path = str(tmp_path / 'vocab.idx')
+    build_vocab_index(iter(WORDS), path, stamp=42, sources=['a.txt', 'b.txt'])
+    index = VocabIndex(path)
+    try:
+        expected = sorted(WORDS, key=len)  # Stable: input order per length
+        assert len(index) == len(expected)
+        assert list(index) == expected
+        assert index[-1] == expected[-1]
+        assert index.len_indexes == length_indexes(expected)
+        assert index.stamp == 42
+        assert index.sources == ['a.txt', 'b.txt']
+        with pytest.raises(IndexError):
+            index[len(expected)]
+    finally:
+        index.close()
+
+
+def test_load_rejects_stale_or_foreign_files(tmp_path):
+    path = str(tmp_path / 'vocab.idx')
+    build_vocab_index(WORDS, path, stamp=7)
+    assert VocabIndex.load(path, stamp=8) is None
+    index = VocabIndex.load(path, stamp=7)
+    assert index is not None
+    index.close()
+    (tmp_path / 'other.idx').write_bytes(b'not an index at all' * 4)
+    assert VocabIndex.load(str(tmp_path / 'other.idx')) is None
+    assert VocabIndex.load(str(tmp_path / 'missing.idx')) is None
+
+
+def test_index_is_current_until_a_source_changes(tmp_path):
+    source = tmp_path / 'en'
+    source.write_text('\n'.join(WORDS))
+    sources = [str(source)]
+    path = str(tmp_path / 'vocab.idx')
+    build_vocab_index(WORDS, path, sources_stamp(sources), sources)
+    index = VocabIndex(path)
+    assert index.is_current()
+    source.write_text('\n'.join(WORDS + ['extra']))
+    assert not index.is_current()
+    source.unlink()
+    assert not index.is_current()
+    index.close()
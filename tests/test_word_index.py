@@ -0,0 +1,49 @@
+from app import Enemy
+from word_index import WordIndex
+
+
+def index_of(*texts):
+    index = WordIndex()
+    enemies = [Enemy(text, 3, 100, 500) for text in texts]
+    for enemy in enemies:
+        index.add(enemy)
+    return index, enemies
+
+
+def test_first_match_returns_a_word_with_the_prefix():
+    index, enemies = index_of('cat', 'car', 'dog')
+    assert index.first_match('ca').text in ('cat', 'car')
+    assert index.first_match('d') is enemies[2]
+    assert index.first_match('x') is None
+    assert index.first_match('cats') is None
+
+
+def test_first_match_prefers_a_word_ending_at_the_prefix():
+    index, enemies = index_of('carpet', 'car')
+    assert index.first_match('car') is enemies[1]
+
+
+def test_removed_words_no_longer_match():
+    index, enemies = index_of('cat', 'car', 'cat')
+    index.remove(enemies[0])
+    assert index.first_match('cat') is enemies[2]
+    assert index.pop('cat') is enemies[2]
+    assert index.first_match('cat') is None
+    assert index.first_match('ca') is enemies[1]
+    assert len(index) == 1
+    index.remove(enemies[1])
+    assert index.first_match('') is None
+    assert not index.root.children  # Dead branches are pruned
+
+
+def test_pop_takes_exact_matches_in_spawn_order():
+    index, enemies = index_of('cat', 'cat', 'cats')
+    assert len(index) == 3
+    assert index.pop('ca') is None
+    assert index.pop('cat') is enemies[0]
+    assert index.pop('cat') is enemies[1]
+    assert index.pop('cat') is None
+    index.remove(enemies[0])  # Already gone: ignored
+    assert len(index) == 1
+    assert index.pop('cats') is enemies[2]
+    assert len(index) == 0 and not index.by_text
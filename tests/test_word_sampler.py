@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from corpus import ListCorpus
+from word_sampler import WordSampler
+
+# Lengths 2 (bucket 0) and 3 (bucket 1) only
+WORDS = ['ab', 'cd', 'ef', 'Bob', 'bob', 'cat', 'dog', 'emu']
+
+
+def sampler_for(corpus, choices, seed=0):
+    sampler = WordSampler(corpus.len_indexes, np.random.default_rng(seed))
+    sampler.set_choices(choices)
+    return sampler
+
+
+def test_unique_sample_has_no_repeats_and_skips_excluded():
+    corpus = ListCorpus(WORDS)
+    sampler = sampler_for(corpus, [True, True])
+    exclude = {0, 1}
+    for seed in range(20):
+        sampler.rng = np.random.default_rng(seed)
+        picked = sampler.sample(6, unique=True, exclude=exclude).tolist()
+        assert len(set(picked)) == 6
+        assert not exclude & set(picked)
+
+
+def test_exclusions_outside_the_selected_lengths_do_not_count():
+    corpus = ListCorpus(WORDS)
+    sampler = sampler_for(corpus, [False, True])  # The five 3-letter words
+    short = {0, 1, 2}  # 2-letter words, never drawn anyway
+    picked = sampler.sample(5, unique=True, exclude=short)
+    assert sorted(picked.tolist()) == [3, 4, 5, 6, 7]
+    with pytest.raises(ValueError):
+        sampler.sample(5, unique=True, exclude=short | {3}, strict=True)
+
+
+def test_key_treats_words_differing_in_case_as_repeats():
+    corpus = ListCorpus(WORDS)
+    sampler = sampler_for(corpus, [False, True])
+    key = lambda i: corpus[i].lower()
+    for seed in range(20):
+        sampler.rng = np.random.default_rng(seed)
+        texts = [corpus[i].lower()
+                 for i in sampler.sample(4, unique=True, key=key)]
+        assert len(set(texts)) == 4
+    with pytest.raises(ValueError):
+        sampler.sample(5, unique=True, key=key, strict=True)  # Only 4 distinct
+
+
+def test_too_few_distinct_words_are_topped_up_with_repeats():
+    corpus = ListCorpus(WORDS)
+    sampler = sampler_for(corpus, [True, False])  # The three 2-letter words
+    picked = sampler.sample(10, unique=True, exclude={0}).tolist()
+    assert len(picked) == 10
+    assert set(picked[:2]) == {1, 2}  # Every distinct word comes first
+    assert set(picked) <= {0, 1, 2}
@@ -0,0 +1,172 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from corpus import Corpus, file_stamp
+
+VOCAB_INDEX_PATH = 'vocab.idx'
+MAGIC = b'TDVI'
+VERSION = 2
+# magic, version, byte order, word count, bucket count, source stamp,
+# size of the source path list that follows the header
+HEADER = struct.Struct('<4sHcxIIQI')
+
+
+# Bucket boundaries for a length-sorted word list given how many words
+# have each length (counts[n] = words of n characters): entry i is the
+# first index of a word with at least i + 2 characters, and the last
+# entry is the word count, so words of length i + 2 are
+# len_indexes[i]:len_indexes[i + 1]
+def length_indexes_from_counts(counts):
+    len_indexes = []
+    start = sum(counts[:2])
+    for length in range(2, len(counts)):
+        len_indexes.append(start)
+        start += counts[length]
+    len_indexes.append(start)
+    return len_indexes
+
+
+# Returns a list of indexes where word length increases in a list
+# sorted by length (same buckets as Dataset.get_length_indexes)
+def length_indexes(wordlist):
+    counts = []
+    for word in wordlist:
+        if len(word) >= len(counts):
+            counts.extend([0] * (len(word) + 1 - len(counts)))
+        counts[len(word)] += 1
+    return length_indexes_from_counts(counts)
+
+
+# Paths of the files NLTK's English word list is read from (what
+# words.words() reads), as NLTK itself resolves them
+def nltk_word_files():
+    from nltk.corpus import words
+    paths = []
+    for pointer in words.abspaths():
+        archive = getattr(pointer, 'zipfile', None)  # Corpus left zipped
+        path = archive.filename if archive is not None else pointer.path
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+
+# Stamp of the files an index was built from; changes when any of them
+# changes, and is 0 when one is missing
+def sources_stamp(paths):
+    stamp = 0
+    for path in paths:
+        try:
+            stamp = (stamp * 31 + file_stamp(path)) & 0xFFFFFFFFFFFFFFFF
+        except OSError:
+            return 0
+    return stamp
+
+
+# Writes words (any iterable, consumed once) as one UTF-8 blob plus word
+# offset and bucket boundary arrays, ordered by length and then by input
+# order. Words are bucketed by length as they stream in, so memory use is
+# the encoded text plus 4 bytes per word, never a Python str per word.
+# sources lists the files the words came from, stamp their sources_stamp.
+def build_vocab_index(words, path=VOCAB_INDEX_PATH, stamp=0, sources=()):
+    blobs = []  # Per length: encoded words
+    ends = []  # Per length: end offset of each word within its blob
+    for word in words:
+        length = len(word)
+        if length >= len(blobs):
+            for _ in range(length + 1 - len(blobs)):
+                blobs.append(bytearray())
+                ends.append(array('I'))
+        blob = blobs[length]
+        blob += word.encode('utf-8')
+        ends[length].append(len(blob))
+    counts = [len(bucket) for bucket in ends]
+    count = sum(counts)
+    if sum(len(blob) for blob in blobs) >= 2 ** 32:
+        raise ValueError('vocabulary text exceeds 4 GiB')
+    len_indexes = length_indexes_from_counts(counts)
+
+    byteorder = b'<' if sys.byteorder == 'little' else b'>'
+    source_list = '\n'.join(sources).encode('utf-8')
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, byteorder, count,
+                            len(len_indexes), stamp, len(source_list)))
+        f.write(source_list)
+        f.write(array('I', len_indexes).tobytes())
+        f.write(array('I', [0]).tobytes())
+        base = 0
+        for bucket, blob in zip(ends, blobs):
+            if base:
+                bucket = array('I', [end + base for end in bucket])
+            f.write(bucket.tobytes())
+            base += len(blob)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)  # Readers never see a half-written index
+
+
+# Read-only, memory-mapped view of a vocabulary index file: the packed
+# corpus backend. Behaves like the length-sorted word list Dataset used
+# to hold, at about 4 bytes of index per word on top of the text.
+class VocabIndex(Corpus):
+    def __init__(self, path=VOCAB_INDEX_PATH):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, byteorder, self.count, n_buckets, self.stamp,
+         sources_size) = HEADER.unpack_from(self.map, 0)
+        native = b'<' if sys.byteorder == 'little' else b'>'
+        if magic != MAGIC or version != VERSION or byteorder != native:
+            self.close()
+            raise ValueError(f'{path} is not a compatible vocabulary index')
+        self.view = view = memoryview(self.map)
+        start, end = HEADER.size, HEADER.size + sources_size
+        sources = str(view[start:end], 'utf-8')
+        self.sources = sources.split('\n') if sources else []
+        start, end = end, end + 4 * n_buckets
+        self.len_indexes = list(view[start:end].cast('I'))
+        start, end = end, end + 4 * (self.count + 1)
+        self.offsets = view[start:end].cast('I')
+        self.blob = view[end:]
+
+    # Opens the index, or returns None when it is missing or stale
+    @classmethod
+    def load(cls, path=VOCAB_INDEX_PATH, stamp=None):
+        try:
+            index = cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        if stamp is not None and index.stamp != stamp:
+            index.close()
+            return None
+        return index
+
+    # Whether the files the index was built from are unchanged
+    def is_current(self):
+        return bool(self.sources) and sources_stamp(self.sources) == self.stamp
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError('word index out of range')
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+    def close(self):
+        for attr in ('offsets', 'blob', 'view'):
+            view = self.__dict__.pop(attr, None)
+            if view is not None:
+                view.release()
+        self.map.close()
+
+
+if __name__ == '__main__':
+    from nltk.corpus import words
+    sources = nltk_word_files()
+    build_vocab_index(words.words(), stamp=sources_stamp(sources),
+                      sources=sources)
+    print(f'Wrote {VOCAB_INDEX_PATH}')
@@ -0,0 +1,90 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from app import Enemy, text_cache
+
+
+# A wave generated for one level and set of word lengths
+class Wave:
+    def __init__(self, level, choices, words):
+        self.level = level
+        self.choices = choices
+        self.words = words
+        self.unrendered = [word.text for word in words]  # For prerender
+
+
+# Generates waves ahead of the one on screen, on a worker thread when
+# background is set, so a level-up only hands over finished words. The
+# worker only picks and lays out words; their surfaces are rendered on
+# the main thread (prerender), as pygame fonts are not thread-safe.
+#
+# Waves are generated strictly in the order they are requested, with the
+# level, word lengths and focus bigrams of the moment they were requested,
+# and a wave that is no longer wanted is discarded, never cancelled. The
+# Dataset's random draws therefore depend only on the requests, and a
+# synchronous pipeline of the same depth (as replays use) makes the same
+# waves as a background one, however the worker is scheduled.
+class WavePipeline:
+    # depth: waves generated ahead (0 generates each wave when spawned)
+    def __init__(self, dataset, depth=0, background=False):
+        self.dataset = dataset  # Only used by the generating thread
+        self.depth = depth
+        self.pool = None
+        if background:
+            self.pool = ThreadPoolExecutor(1, thread_name_prefix='waves')
+            self.pool.submit(dataset.load_ngrams)  # Before any wave
+        self.pending = deque()  # (level, choices, Future of a Wave)
+
+    def make_wave(self, level, choices, focus):
+        words = self.dataset.get_words(level, list(choices), focus=focus)
+        return Wave(level, choices, words)
+
+    def request(self, level, choices, focus):
+        if self.pool is not None:
+            future = self.pool.submit(self.make_wave, level, choices, focus)
+        else:
+            future = Future()
+            future.set_result(self.make_wave(level, choices, focus))
+        self.pending.append((level, choices, future))
+
+    # Makes sure waves for level and the levels after it, up to count (the
+    # pipeline depth by default), are on their way. Waves queued for other
+    # levels or word lengths are discarded first. focus is called for the
+    # focus bigrams only when a wave is requested.
+    def prefetch(self, level, choices, focus, count=None):
+        choices = tuple(choices)
+        if self.pending and (self.pending[0][0] != level
+                             or self.pending[0][1] != choices):
+            self.pending.clear()
+        count = self.depth if count is None else count
+        if len(self.pending) >= count:
+            return
+        bigrams = focus()
+        while len(self.pending) < count:
+            self.request(level + len(self.pending), choices, bigrams)
+
+    # Returns the words of the wave for level, waiting for it if it is
+    # still being generated
+    def take(self, level, choices, focus):
+        self.prefetch(level, choices, focus, max(self.depth, 1))
+        return self.pending.popleft()[2].result().words
+
+    # Renders up to count words of the finished waves ahead into the text
+    # cache, so a level-up does not render a whole wave in one frame.
+    # Called from the main thread between frames.
+    def prerender(self, font, count=8):
+        for _, _, future in self.pending:
+            if not future.done():
+                return
+            unrendered = future.result().unrendered
+            while unrendered and count:
+                text_cache.render(font, unrendered.pop(), Enemy.colour)
+                count -= 1
+            if not count:
+                return
+
+    # Stops the worker once the wave it is generating is done; waves not
+    # started yet are dropped
+    def close(self):
+        self.pending.clear()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
@@ -0,0 +1,79 @@
+class _TrieNode:
+    __slots__ = ('children', 'count', 'ends')
+
+    def __init__(self):
+        self.children = {}
+        self.count = 0  # Number of live words passing through this node
+        self.ends = 0  # Number of live words ending at this node
+
+
+# Incremental index over the words currently on screen: a prefix trie for
+# keystroke matching and a hash map from text to enemies for submissions
+class WordIndex:
+    def __init__(self):
+        self.root = _TrieNode()
+        self.by_text = {}
+
+    def __len__(self):
+        return self.root.count
+
+    # Index a newly spawned enemy
+    def add(self, enemy):
+        node = self.root
+        node.count += 1
+        for char in enemy.text:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            child.count += 1
+            node = child
+        node.ends += 1
+        self.by_text.setdefault(enemy.text, []).append(enemy)
+
+    # Drop an enemy that expired or was killed
+    def remove(self, enemy):
+        enemies = self.by_text.get(enemy.text)
+        if not enemies or enemy not in enemies:
+            return
+        enemies.remove(enemy)
+        if not enemies:
+            del self.by_text[enemy.text]
+        node = self.root
+        node.count -= 1
+        for char in enemy.text:
+            child = node.children[char]
+            child.count -= 1
+            if child.count == 0:
+                del node.children[char]  # Prune the now-dead branch
+                return
+            node = child
+        node.ends -= 1
+
+    # Returns some live enemy whose text starts with prefix, or None;
+    # walks at most one word's length below the prefix
+    def first_match(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        if node.count == 0:
+            return None
+        text = prefix
+        while not node.ends:
+            char, node = next(iter(node.children.items()))
+            text += char
+        return self.by_text[text][0]
+
+    # Returns (and un-indexes) an enemy whose text is exactly text, or None
+    def pop(self, text):
+        enemies = self.by_text.get(text)
+        if not enemies:
+            return None
+        enemy = enemies[0]
+        self.remove(enemy)
+        return enemy
+
+    def clear(self):
+        self.root = _TrieNode()
+        self.by_text = {}
@@ -0,0 +1,102 @@
+import numpy as np
+
+MAX_ROUNDS = 64  # Draw rounds before unique sampling gives up
+
+
+# Draws vocabulary indexes from the selected word-length buckets in one
+# vectorized call. The cumulative weight table is rebuilt only when the
+# selected lengths change.
+class WordSampler:
+    # weighting: 'size' weights each bucket by its number of words (uniform
+    # over all selected words); 'equal' gives every selected bucket the same
+    # share, as the original random.choice over buckets did
+    def __init__(self, len_indexes, rng=None, weighting='size'):
+        if weighting not in ('size', 'equal'):
+            raise ValueError(f'unknown weighting: {weighting}')
+        self.len_indexes = len_indexes
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.weighting = weighting
+        self.key = None
+        self.starts = None  # First vocabulary index of each selected bucket
+        self.sizes = None
+        self.cumulative = None  # Running bucket weights, ends at 1.0
+
+    def set_choices(self, choices):
+        key = tuple(choices)
+        if key == self.key:
+            return
+        buckets = [(self.len_indexes[i], self.len_indexes[i + 1])
+                   for i in range(len(choices))
+                   if choices[i] and i + 1 < len(self.len_indexes)]
+        buckets = [(start, stop) for start, stop in buckets if stop > start]
+        if not buckets:
+            raise ValueError('no words of the selected lengths')
+        self.starts = np.array([start for start, _ in buckets])
+        self.sizes = np.array([stop - start for start, stop in buckets])
+        weights = (self.sizes if self.weighting == 'size'
+                   else np.ones(len(buckets)))
+        self.cumulative = np.cumsum(weights / weights.sum())
+        self.cumulative[-1] = 1.0
+        self.key = key
+
+    # (first, stop) vocabulary index range of each selected bucket
+    def buckets(self):
+        return [(int(start), int(start + size))
+                for start, size in zip(self.starts, self.sizes)]
+
+    # n vocabulary indexes; with unique=True none repeats and none is in
+    # exclude (e.g. indexes picked some other way). key maps an index to
+    # what makes two words the same (e.g. the lowercased text); by default
+    # that is the index itself. When the selected lengths have fewer than
+    # n such words, repeats fill the rest, or ValueError is raised if
+    # strict is set.
+    def sample(self, n, unique=False, exclude=(), key=None, strict=False):
+        if not unique:
+            return self.draw(n)
+        excluded = np.unique(np.fromiter(exclude, dtype=np.int64,
+                                         count=len(exclude)))
+        inside = np.zeros(len(excluded), dtype=bool)
+        for start, size in zip(self.starts, self.sizes):
+            inside |= (excluded >= start) & (excluded < start + size)
+        available = int(self.sizes.sum()) - int(inside.sum())
+        if n > available and strict:
+            raise ValueError(f'only {available} distinct words available')
+        wanted = min(n, available)
+        taken = () if key is None else {key(i) for i in excluded.tolist()}
+        picked = np.empty(0, dtype=np.int64)
+        for _ in range(MAX_ROUNDS):
+            if len(picked) >= wanted:
+                break
+            extra = self.draw(2 * (wanted - len(picked)) + 8)
+            both = np.concatenate((picked, extra))
+            # Keep the first occurrence of each index, in draw order
+            _, first = np.unique(both, return_index=True)
+            both = both[np.sort(first)]
+            picked = both[~np.isin(both, excluded)]
+            if key is not None:
+                picked = distinct(picked, key, taken)
+        if len(picked) >= n:
+            return picked[:n]
+        if strict:
+            raise ValueError(f'could not draw {n} distinct words')
+        return np.concatenate((picked, self.draw(n - len(picked))))
+
+    def draw(self, n):
+        bucket = np.searchsorted(self.cumulative, self.rng.random(n),
+                                 side='right')
+        bucket = np.minimum(bucket, len(self.sizes) - 1)
+        offset = (self.rng.random(n) * self.sizes[bucket]).astype(np.int64)
+        return self.starts[bucket] + offset
+
+
+# indexes without repeats by key (first occurrence kept, in order) and
+# without any whose key is in taken
+def distinct(indexes, key, taken=()):
+    seen = set(taken)
+    keep = []
+    for i in indexes.tolist():
+        k = key(i)
+        if k not in seen:
+            seen.add(k)
+            keep.append(i)
+    return np.array(keep, dtype=np.int64)